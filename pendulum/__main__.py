@@ -0,0 +1,4 @@
+import sys
+from pendulum.cli import main
+
+sys.exit(main())
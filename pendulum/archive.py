@@ -0,0 +1,331 @@
+import json
+import os
+import struct
+import zlib
+import numpy as np
+from pendulum.reducers import Reducer
+
+## An archive is a single file with many simulation outputs (runs):
+## - a header (_MAGIC)
+## - the blocks: zlib-compressed chunks of consecutive times of a run
+## - the index: json with the parameters, shape and blocks of each run
+## - a footer: the size of the index (8 bytes, little endian) and _MAGIC
+##
+## Each block is self-contained (its times, and its states encoded from its
+## first row), so a time window can be read by decompressing only the blocks
+## that overlap it.
+
+_MAGIC = b'PNDARCH1'
+
+class ArchiveWriter():
+    """Writes simulation outputs to a compressed archive
+
+    The states are stored with the chosen precision, delta encoded along time
+    (consecutive states of smooth trajectories are similar, so their
+    differences are small), byte shuffled and compressed. The times are
+    always stored exactly.
+
+    The file is written to a temporary path, and moved to its final path on
+    close, so an unfinished archive never replaces a previous one. It can be
+    used as a context manager, which discards the archive if an exception is
+    raised inside the with block.
+
+    :param path: the archive to create
+    :param precision: 'float64' (lossless, default), 'float32', or 'quantized' (rounded to multiples of tol)
+    :param tol: quantization step, if precision is 'quantized'
+    :param delta: set to False to disable the delta encoding
+    :param level: zlib compression level (0-9)
+    :param chunk: maximum number of times per block
+    """
+
+    def __init__(self, path, precision='float64', tol=1e-6, delta=True, level=6, chunk=1000):
+
+        ## Avoid wrong inputs
+        if precision not in ('float64', 'float32', 'quantized'):
+            raise ValueError("Wrong precision. Expected 'float64', 'float32' or 'quantized'")
+
+        if (tol <= 0.0) or (chunk < 1):
+            raise ValueError('Wrong tol or chunk. Expected positive values')
+
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.precision = precision
+        self.tol = tol
+        self.delta = delta
+        self.level = level
+        self.chunk = chunk
+        self.runs = {}
+
+        self.file = open(self.tmp_path, 'wb')
+        self.file.write(_MAGIC)
+
+    def add(self, name, ts, sol, **params):
+        """Writes a complete timeseries
+
+        :param name: the name of the run (unique within the archive)
+        :param ts: integration times
+        :param sol: the timeseries, as returned by the solvers (or their ensemble forms)
+        :param ``**params``: parameters of the run, stored in the index (json serializable, or numpy arrays)
+        """
+
+        self._start(name, np.shape(sol)[1:], params)
+        self._write(name, ts, sol)
+
+    def sink(self, name, **params):
+        """Returns a reducer that writes the timeseries while it is integrated
+
+        Example: pendulum(yinit, ts, reducers={'archive': writer.sink('run_1', l=1.0)})
+
+        :param name: the name of the run (unique within the archive)
+        :param ``**params``: parameters of the run, stored in the index (json serializable, or numpy arrays)
+        :returns: an ArchiveSink
+        """
+
+        return ArchiveSink(self, name, params)
+
+    def close(self):
+        """Writes the index, and moves the archive to its final path
+        """
+
+        if self.file.closed:
+            return
+
+        index = json.dumps({'precision': self.precision, 'tol': self.tol, 'delta': self.delta, 'runs': self.runs}).encode('utf-8')
+        self.file.write(index)
+        self.file.write(struct.pack('<Q', len(index)) + _MAGIC)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is None:
+            self.close()
+        elif not self.file.closed: # Discard the unfinished archive, keeping the previous one
+            self.file.close()
+            os.remove(self.tmp_path)
+
+    def _start(self, name, shape, params):
+        """ Registers a new run in the index
+        """
+
+        if name in self.runs:
+            raise ValueError('Wrong name. The run {} already exists'.format(name))
+
+        self.runs[name] = {'params': _jsonable(params), 'shape': list(shape), 'length': 0, 'blocks': []}
+
+    def _write(self, name, ts, sol):
+        """ Appends a piece of a run's timeseries, as blocks of at most chunk times
+        """
+
+        run = self.runs[name]
+        ts, sol = np.asarray(ts, dtype=float), np.asarray(sol, dtype=float)
+        if (len(ts) != len(sol)) or (list(sol.shape[1:]) != run['shape']):
+            raise ValueError('Wrong timeseries. Expected one state of shape {} per time'.format(tuple(run['shape'])))
+
+        for i in range(0, len(ts), self.chunk):
+            data, dtype = self._encode(sol[i:i+self.chunk])
+            block = zlib.compress(ts[i:i+self.chunk].tobytes() + data, self.level)
+
+            run['blocks'].append({'offset': self.file.tell(),
+                                  'size': len(block),
+                                  'count': len(ts[i:i+self.chunk]),
+                                  't0': float(ts[i]), 't1': float(ts[i:i+self.chunk][-1]),
+                                  'dtype': dtype})
+            self.file.write(block)
+        run['length'] += len(ts)
+
+    def _encode(self, sol):
+        """ Returns the encoded bytes of a block of states, and their dtype
+        """
+
+        ## Integer representation
+        sol = np.ascontiguousarray(sol)
+        if self.precision == 'float64':
+            ints = sol.view(np.int64)
+        elif self.precision == 'float32':
+            ints = sol.astype(np.float32).view(np.int32)
+        else:
+            ints = np.round(sol / self.tol).astype(np.int64)
+
+        ## Delta encoding (integer overflows wrap around, and are undone when decoding)
+        if self.delta:
+            ints = np.concatenate((ints[:1], np.diff(ints, axis=0)))
+
+        ## Quantized values are stored with the smallest integer type that fits them
+        if self.precision == 'quantized':
+            for dtype in (np.int8, np.int16, np.int32):
+                info = np.iinfo(dtype)
+                if (ints.min() >= info.min) and (ints.max() <= info.max):
+                    ints = ints.astype(dtype)
+                    break
+
+        return _shuffle(ints), ints.dtype.str
+
+class ArchiveSink(Reducer):
+    """Reducer that writes the timeseries to an archive (see ArchiveWriter.sink)
+
+    Each sink writes a single run, so it can't be reused in another simulation.
+
+    :param writer: the ArchiveWriter
+    :param name: the name of the run
+    :param params: parameters of the run
+    """
+
+    def __init__(self, writer, name, params):
+        self.writer = writer
+        self.name = name
+        self.params = params
+
+    def reset(self):
+        if self.name in self.writer.runs: # Appending a second timeseries would restart its times
+            raise ValueError('Wrong name. The run {} already exists'.format(self.name))
+
+    def update(self, ts, states):
+        if self.name not in self.writer.runs:
+            self.writer._start(self.name, states.shape[1:], self.params)
+        self.writer._write(self.name, ts, states)
+
+    def result(self):
+        return self.name
+
+class Archive():
+    """Reads an archive written by ArchiveWriter
+
+    Only the index is read when opening it. The blocks are read and
+    decompressed on demand.
+
+    :param path: the archive
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError('Wrong file. {} is not an archive'.format(path))
+
+            f.seek(-(8 + len(_MAGIC)), os.SEEK_END)
+            footer = f.read()
+            if footer[8:] != _MAGIC: # Unfinished archives have no footer
+                raise ValueError('Wrong file. {} is incomplete'.format(path))
+
+            size, = struct.unpack('<Q', footer[:8])
+            f.seek(-(size + len(footer)), os.SEEK_END)
+            self.index = json.loads(f.read(size).decode('utf-8'))
+
+    @property
+    def runs(self):
+        """The names of the runs, in writing order
+        """
+        return list(self.index['runs'])
+
+    def params(self, name):
+        """Returns the parameters of a run
+
+        :param name: the name of the run
+        :returns: a dictionary
+        """
+        return self._run(name)['params']
+
+    def select(self, **params):
+        """Returns the names of the runs with the given parameters
+
+        :param ``**params``: the parameters to match
+        :returns: a list of names
+        """
+        params = _jsonable(params)
+        return [name for name, run in self.index['runs'].items() if all(run['params'].get(key) == value for key, value in params.items())]
+
+    def read(self, name, t0=None, t1=None):
+        """Reads the timeseries of a run, or a time window of it
+
+        :param name: the name of the run
+        :param t0: first time of the window. If None, from the beginning
+        :param t1: last time of the window. If None, until the end
+        :returns: ts and sol, as returned by the solvers
+        """
+
+        run = self._run(name)
+        t0 = -np.inf if t0 is None else t0
+        t1 = np.inf if t1 is None else t1
+        blocks = [block for block in run['blocks'] if (block['t1'] >= t0) and (block['t0'] <= t1)]
+
+        tss, sols = [np.empty(0)], [np.empty((0,) + tuple(run['shape']))]
+        with open(self.path, 'rb') as f:
+            for block in blocks:
+                f.seek(block['offset'])
+                ts, sol = self._decode(zlib.decompress(f.read(block['size'])), block, run['shape'])
+                keep = (ts >= t0) & (ts <= t1)
+                tss.append(ts[keep])
+                sols.append(sol[keep])
+
+        return np.concatenate(tss), np.concatenate(sols)
+
+    def _run(self, name):
+        """ Returns the index entry of a run
+        """
+
+        if name not in self.index['runs']:
+            raise ValueError('Wrong name. The run {} is not in the archive'.format(name))
+
+        return self.index['runs'][name]
+
+    def _decode(self, data, block, shape):
+        """ Returns the times and the states of a decompressed block
+        """
+
+        n = block['count']
+        ts = np.frombuffer(data[:8*n], dtype=np.float64)
+        ints = _unshuffle(data[8*n:], np.dtype(block['dtype']), (n,) + tuple(shape))
+
+        precision = self.index['precision']
+        if precision == 'quantized':
+            ints = ints.astype(np.int64)
+        if self.index['delta']:
+            ints = np.cumsum(ints, axis=0, dtype=ints.dtype)
+
+        if precision == 'float64':
+            sol = ints.view(np.float64)
+        elif precision == 'float32':
+            sol = ints.view(np.float32).astype(np.float64)
+        else:
+            sol = ints * self.index['tol']
+
+        return ts, sol
+
+def _shuffle(ints):
+    """ Returns the bytes of an array, grouped by significance (all the first bytes, then all the second ones...)
+
+    The most significant bytes of similar numbers are alike, so grouping them
+    makes the data much more compressible.
+    """
+
+    ints = np.ascontiguousarray(ints)
+    return ints.view(np.uint8).reshape(-1, ints.itemsize).T.tobytes()
+
+def _unshuffle(data, dtype, shape):
+    """ Inverse of _shuffle
+    """
+
+    shuffled = np.frombuffer(data, dtype=np.uint8).reshape(dtype.itemsize, -1)
+    return np.ascontiguousarray(shuffled.T).view(dtype).reshape(shape)
+
+def _jsonable(params):
+    """ Returns the parameters converted to json serializable types
+    """
+
+    out = {}
+    for key, value in params.items():
+        if callable(value): # Functions can't be stored
+            raise ValueError('Wrong parameter {}. Expected a value, not a function'.format(key))
+        value = value.tolist() if isinstance(value, (np.ndarray, np.generic)) else value
+        try:
+            out[key] = json.loads(json.dumps(value)) # As read back (e.g.: tuples become lists)
+        except TypeError:
+            raise ValueError('Wrong parameter {}. Expected a json serializable value'.format(key))
+
+    return out
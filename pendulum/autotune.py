@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import time
+import numpy as np
+from pendulum.schedules import Schedule
+
+## The candidates are the integrators available to the solvers (odeint's
+## LSODA, and some of solve_ivp's methods) at several tolerances
+_TOLERANCES = (1e-4, 1e-6, 1e-8, 1e-10)
+_METHODS = (None, 'RK45', 'DOP853') # None stands for odeint
+
+_CANDIDATES = [dict({'rtol': tol, 'atol': tol}, **({'method': method} if method else {}))
+               for method in _METHODS for tol in _TOLERANCES]
+
+_REFERENCE = {'method': 'DOP853', 'rtol': 1e-13, 'atol': 1e-13}
+
+_cache = {} # In-memory cache, shared by all the calls in a session
+
+def autotune(solver, yinit, ts, accuracy=1e-6, probe=0.1, candidates=None, cache=None, cache_key=None, **kwargs):
+    """Returns the cheapest integrator configuration meeting a requested accuracy
+
+    Short probe integrations (over the first times of ts) are run for each
+    candidate configuration, and compared against a very accurate reference.
+    Among the candidates whose maximum absolute error is below accuracy, the
+    fastest one is chosen. If none of them is accurate enough, the most
+    accurate one is chosen.
+
+    The choice is cached per solver and parameter region (parameters rounded
+    to two significant digits, and initial conditions to one decimal).
+    Schedules are identified by their samples, and functions by their module
+    and name. Anonymous functions (lambdas, closures) and other values that
+    can't be described have no stable identity: the choice is not cached,
+    unless a cache_key identifying them is given.
+
+    Reducers and dense output are not used by the probes, which compare
+    timeseries.
+
+    :param solver: pendulum, double_pendulum, or one of their ensemble forms
+    :param yinit: initial conditions
+    :param ts: integration times
+    :param accuracy: maximum absolute error allowed during the probe
+    :param probe: fraction of the integration times used by the probes
+    :param candidates: list of configurations (keyword arguments of the solver) to probe. Defaults to odeint, RK45 and DOP853 at several tolerances
+    :param cache: json file where the choices are persisted. If None, they are only cached in memory
+    :param cache_key: string identifying the arguments that can't be described (e.g.: a lambda as the pivot's movement). If None, problems with such arguments are not cached
+    :param ``**kwargs``: keyword arguments of the solver (e.g.: pivot's movement, l, g)
+    :returns: the chosen configuration, as a dictionary of keyword arguments of the solver
+    """
+
+    ## Avoid wrong inputs
+    if (accuracy <= 0.0): # Perfection can't be reached
+        raise ValueError('Wrong accuracy. Expected a positive float')
+
+    if not (0.0 < probe <= 1.0):
+        raise ValueError('Wrong probe fraction (probe). Expected a float in (0, 1]')
+
+    ## The probes compare timeseries
+    kwargs = {name: value for name, value in kwargs.items() if name not in ('reducers', 'dense')}
+
+    ## Look for a cached choice
+    key = _region(solver, yinit, accuracy, kwargs, cache_key)
+    if key is not None and cache is not None and key not in _cache and os.path.exists(cache):
+        with open(cache) as f:
+            _cache.update(json.load(f))
+    if key in _cache:
+        return dict(_cache[key])
+
+    ## Probe the candidates
+    ts = np.asarray(ts, dtype=float)
+    probe_ts = ts[:max(2, int(probe*len(ts)))]
+    reference = solver(yinit, probe_ts, **dict(kwargs, **_REFERENCE))
+
+    results = []
+    for config in (candidates or _CANDIDATES):
+        start = time.perf_counter()
+        try:
+            sol = solver(yinit, probe_ts, **dict(kwargs, **config))
+        except RuntimeError: # The integrator gave up
+            continue
+        cost = time.perf_counter() - start
+        error = np.max(np.abs(sol - reference))
+        results.append((error > accuracy, cost if error <= accuracy else error, config))
+
+    if not results:
+        raise RuntimeError('All the candidate integrators failed')
+
+    ## Choose the cheapest accurate configuration (or the most accurate one)
+    best = min(results, key=lambda r : r[:2])[2]
+
+    ## Cache it
+    if key is None: # No stable identity
+        return dict(best)
+
+    _cache[key] = best
+    if cache is not None:
+        stored = {}
+        if os.path.exists(cache):
+            with open(cache) as f:
+                stored = json.load(f)
+        stored[key] = best
+        tmp_path = '{}.{}.tmp'.format(cache, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(stored, f, indent=1)
+        os.replace(tmp_path, cache)
+
+    return dict(best)
+
+def tuned(solver, yinit, ts, accuracy=1e-6, cache=None, cache_key=None, **kwargs):
+    """Returns the timeseries of a simulation run with an autotuned integrator
+
+    :param solver: pendulum, double_pendulum, or one of their ensemble forms
+    :param yinit: initial conditions
+    :param ts: integration times
+    :param accuracy: maximum absolute error allowed during the probe (see autotune)
+    :param cache: json file where the choices are persisted. If None, they are only cached in memory
+    :param cache_key: string identifying the arguments that can't be described (see autotune)
+    :param ``**kwargs``: keyword arguments of the solver
+    :returns: the simulation's timeseries
+    """
+
+    config = autotune(solver, yinit, ts, accuracy, cache=cache, cache_key=cache_key, **kwargs)
+
+    return solver(yinit, ts, **dict(kwargs, **config))
+
+def _region(solver, yinit, accuracy, kwargs, cache_key=None):
+    """ Returns the key of the parameter region of a problem
+
+    :returns: the key, or None if some argument can't be described and no cache_key is given
+    """
+
+    def describe(value):
+        if isinstance(value, Schedule):
+            data = value.hold.encode('utf-8') + value.ts.tobytes() + value.values.tobytes()
+            return 'Schedule:' + hashlib.blake2b(data, digest_size=8).hexdigest()
+        if callable(value):
+            name = getattr(value, '__qualname__', '')
+            if not name or '<' in name: # Lambdas and closures have no stable identity
+                return cache_key
+            return '{}.{}'.format(getattr(value, '__module__', ''), name)
+        if isinstance(value, str):
+            return value
+        try:
+            values = np.asarray(value, dtype=float).ravel()
+        except (TypeError, ValueError): # Not numeric
+            return cache_key
+        return ','.join('{:.2g}'.format(v) for v in values)
+
+    params = [(name, describe(value)) for name, value in sorted(kwargs.items())]
+    if any(description is None for _, description in params):
+        return None
+
+    y = ','.join('{:.1f}'.format(v) for v in np.asarray(yinit, dtype=float).ravel())
+    key = [solver.__name__, 'accuracy={:.1g}'.format(accuracy), 'yinit=' + y] + ['{}={}'.format(*param) for param in params]
+    if cache_key is not None:
+        key.append('cache_key=' + cache_key)
+
+    return '|'.join(key)
@@ -0,0 +1,89 @@
+import numpy as np
+from pendulum.models import pendulum_ensemble
+
+def basins(ths, ws, attractors, period, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, l=1.0, g=9.8, d=0.1, h=1e-4, t0=0.0, tol=1e-2, settle=2, max_periods=500, **kwargs):
+    """Returns the basin of attraction of each initial condition of a grid
+
+    The whole grid is integrated as a vectorized ensemble, and sampled
+    stroboscopically once per forcing period. As soon as an initial condition
+    stays close to a known attractor for a few consecutive samples, it is
+    removed from the ensemble, so the computational effort concentrates on
+    the slow-settling ones (typically, near the basins' boundaries).
+
+    :param ths: initial angles (e.g.: from np.meshgrid)
+    :param ws: initial angular speeds, with the same shape as ths
+    :param attractors: the known attractors, as a list of (th, w) at the stroboscopic times t0 + k*period
+    :param period: the pivot's forcing period
+    :param pivot_x: the horizontal position of the pivot
+    :type pivot_x: function of time or constant
+    :param pivot_y: the vertical position of the pivot
+    :type pivot_y: function of time or constant
+    :param is_acceleration: set to True to input pivot accelerations instead of positions
+    :type is_acceleration: boolean
+    :param l: the pendulum's length (constant, or one per initial condition)
+    :param g: the local acceleration of gravity (constant, or one per initial condition)
+    :param d: the damping constant (constant, or one per initial condition)
+    :param h: numerical step for computing numerical derivatives
+    :param t0: initial time
+    :param tol: maximum distance to an attractor, in the (th, w) plane (angles are compared modulo 2 pi)
+    :param settle: number of consecutive stroboscopic samples required close to the same attractor
+    :param max_periods: maximum number of forcing periods to integrate
+    :param ``**kwargs``: odeint keyword arguments
+    :returns: labels (the index of each initial condition's attractor, or -1 if undetermined) and periods (the number of forcing periods integrated for each initial condition), both with the same shape as ths
+    """
+
+    ## Avoid wrong inputs
+    ths, ws = np.broadcast_arrays(np.asarray(ths, dtype=float), np.asarray(ws, dtype=float))
+    attractors = np.atleast_2d(np.asarray(attractors, dtype=float))
+    if (attractors.shape[1] != 2): # Attractors are states (th, w)
+        raise ValueError('Wrong attractors. Expected a list of (th, w)')
+
+    if np.any(np.less_equal(d, 0.0)): # Without damping there are no attractors
+        raise ValueError('Wrong damping constant (d). Expected positive float')
+
+    if (period <= 0.0) or (settle < 1):
+        raise ValueError('Wrong period or settle. Expected positive values')
+
+    ## Flatten the grid
+    shape = ths.shape
+    ys = np.stack((ths.ravel(), ws.ravel()), axis=1)
+    params = [np.broadcast_to(p, shape).ravel() if np.ndim(p) else p for p in (l, g, d)]
+
+    labels = np.full(len(ys), -1)
+    periods = np.zeros(len(ys), dtype=int)
+    candidates = np.full(len(ys), -1) # Closest attractor at the last sample
+    counts = np.zeros(len(ys), dtype=int) # Consecutive samples close to it
+    active = np.arange(len(ys))
+
+    for k in range(max_periods):
+        if not len(active):
+            break
+
+        ## Integrate the active initial conditions during one period
+        ts = (t0 + k*period, t0 + (k+1)*period)
+        l_k, g_k, d_k = [p[active] if np.ndim(p) else p for p in params]
+        ys[active] = pendulum_ensemble(ys[active], ts, pivot_x, pivot_y, is_acceleration, l_k, g_k, d_k, h, **kwargs)[-1]
+        periods[active] += 1
+
+        ## Stroboscopic sample
+        dth = _wrap(ys[active, 0:1] - attractors[:, 0])
+        dw = ys[active, 1:2] - attractors[:, 1]
+        dists = np.hypot(dth, dw)
+        closest = np.argmin(dists, axis=1)
+        close = dists[np.arange(len(active)), closest] < tol
+
+        counts[active] = np.where(close, np.where(closest == candidates[active], counts[active] + 1, 1), 0)
+        candidates[active] = np.where(close, closest, -1)
+
+        ## Remove the converged ones
+        converged = counts[active] >= settle
+        labels[active[converged]] = candidates[active[converged]]
+        active = active[~converged]
+
+    return labels.reshape(shape), periods.reshape(shape)
+
+def _wrap(th):
+    """ Returns angles in the interval [-pi, pi)
+    """
+
+    return (th + np.pi) % (2*np.pi) - np.pi
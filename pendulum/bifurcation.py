@@ -0,0 +1,102 @@
+import multiprocessing
+import numpy as np
+from pendulum.models import pendulum
+from pendulum.basins import _wrap
+
+## The driven pendulum: the pivot oscillates horizontally (or vertically) as
+## A cos(W t), so its acceleration is -A W**2 cos(W t). The stroboscopic
+## section samples the state once per forcing period, at t = k * 2 pi / W.
+
+_PARAMETERS = ('amplitude', 'frequency', 'l', 'g', 'd')
+
+def bifurcation(parameter, values, yinits=((0.1, 0.0),), directions=('forward', 'backward'), amplitude=0.1, frequency=2.0, axis='x', l=1.0, g=9.8, d=0.1, transient=200, warm_transient=20, samples=50, processes=None, **kwargs):
+    """Returns the bifurcation diagram of the driven pendulum
+
+    The parameter is swept along its values, and each value is warm-started
+    from the last state of the previous one (close to its attractor), so only
+    a short transient is needed. Sweeping forward and backward captures
+    hysteresis (coexisting attractors).
+
+    Each initial condition and direction is an independent branch. The
+    branches run in parallel, across a pool of processes.
+
+    :param parameter: the swept parameter: 'amplitude', 'frequency' (of the pivot's oscillation), 'l', 'g' or 'd'
+    :param values: the values of the parameter, in forward order
+    :param yinits: initial conditions (th, w), one branch (per direction) each
+    :param directions: 'forward' (values in the given order) and/or 'backward' (reversed)
+    :param amplitude: amplitude of the pivot's oscillation
+    :param frequency: angular frequency of the pivot's oscillation
+    :param axis: 'x' (horizontal oscillation) or 'y' (vertical oscillation)
+    :param l: the pendulum's length
+    :param g: the local acceleration of gravity
+    :param d: the damping constant
+    :param transient: number of forcing periods discarded at the first value of each branch
+    :param warm_transient: number of forcing periods discarded at the following values
+    :param samples: number of stroboscopic samples per value
+    :param processes: number of processes. Defaults to the number of cores
+    :param ``**kwargs``: odeint keyword arguments
+    :returns: the stroboscopic sections, with shape (len(yinits), len(directions), len(values), samples, 2). The values axis is in the given order for both directions, and the angles are in [-pi, pi)
+    """
+
+    ## Avoid wrong inputs
+    if parameter not in _PARAMETERS:
+        raise ValueError('Wrong parameter. Use one of {}'.format(_PARAMETERS))
+
+    if any(direction not in ('forward', 'backward') for direction in directions):
+        raise ValueError("Wrong directions. Expected 'forward' and/or 'backward'")
+
+    if axis not in ('x', 'y'):
+        raise ValueError("Wrong axis. Expected 'x' or 'y'")
+
+    if (transient < 0) or (warm_transient < 0) or (samples < 1):
+        raise ValueError('Wrong periods. Expected transient, warm_transient >= 0 and samples >= 1')
+
+    values = np.asarray(values, dtype=float)
+    yinits = np.atleast_2d(np.asarray(yinits, dtype=float))
+    fixed = {'amplitude': amplitude, 'frequency': frequency, 'l': l, 'g': g, 'd': d}
+
+    ## One task per branch
+    tasks, flips = [], []
+    for yinit in yinits:
+        for direction in directions:
+            flip = (direction == 'backward')
+            tasks.append((yinit, parameter, values[::-1] if flip else values, fixed, axis, transient, warm_transient, samples, kwargs))
+            flips.append(flip)
+
+    if processes == 1: # Avoid the pool overhead
+        branches = list(map(_branch, tasks))
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            branches = pool.map(_branch, tasks)
+
+    ## Backward branches are stored in the order of the values
+    sections = np.array([branch[::-1] if flip else branch for flip, branch in zip(flips, branches)])
+
+    return sections.reshape((len(yinits), len(directions), len(values), samples, 2))
+
+def _branch(task):
+    """ Sweeps the parameter along one branch, warm-starting each value
+
+    :param task: the initial condition, parameter, values, fixed parameters, axis, transients, samples and odeint keyword arguments
+    :returns: the stroboscopic sections, with shape (len(values), samples, 2)
+    """
+
+    yinit, parameter, values, fixed, axis, transient, warm_transient, samples, kwargs = task
+
+    y = yinit
+    sections = []
+    for i, value in enumerate(values):
+        p = dict(fixed, **{parameter: value})
+        A, W = p['amplitude'], p['frequency']
+        accel = lambda t : -A * W**2 * np.cos(W*t)
+        pivot_x, pivot_y = (accel, 0.0) if axis == 'x' else (0.0, accel)
+
+        ## The forcing is periodic, so each value starts again at t = 0
+        skip = transient if i == 0 else warm_transient
+        ts = np.arange(skip + samples + 1) * 2*np.pi/W
+        sol = pendulum(y, ts, pivot_x, pivot_y, True, p['l'], p['g'], p['d'], **kwargs)
+
+        sections.append(np.stack((_wrap(sol[skip+1:, 0]), sol[skip+1:, 1]), axis=-1))
+        y = sol[-1]
+
+    return np.array(sections)
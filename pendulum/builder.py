@@ -0,0 +1,242 @@
+import hashlib
+import importlib.util
+import keyword
+import os
+import re
+from pendulum.models import _format_accelerations, _solve, _isolve, _reduce, _discontinuities
+
+## Models are derived symbolically (with sympy) only once. The resulting
+## numpy code is cached on disk, and later builds just import it
+
+_VERSION = '1' # Bump to invalidate the cached models
+
+## Names used by the generated code: arguments, states (q0, w0...),
+## accelerations (qdd0...) and common subexpressions (_x0...)
+_RESERVED = re.compile(r'^(state|t|accel_x|accel_y|numpy|(q|w|qdd|_x)\d+)$')
+
+def pivot(t):
+    """Returns the pivot's position, to be used in Lagrangians
+
+    :param t: sympy symbol for the time
+    :returns: pivot_x(t) and pivot_y(t), as sympy functions
+    """
+
+    import sympy as sp
+
+    return sp.Function('pivot_x')(t), sp.Function('pivot_y')(t)
+
+def build_model(lagrangian, coords, t, params=(), forces=None, name='model', cache_dir=None):
+    """Derives a non-inertial model from its Lagrangian
+
+    The Lagrangian is written in the inertial frame, using the pivot's position
+    (see pivot). As in pendulum and double_pendulum, only the pivot's
+    accelerations appear in the resulting equations.
+
+    The equations of motion and their jacobian are simplified by common
+    subexpression elimination, translated into numpy code, and cached.
+
+    :param lagrangian: sympy expression of the Lagrangian
+    :param coords: the generalized coordinates, as sympy functions of t (e.g.: [th(t)])
+    :param t: sympy symbol for the time
+    :param params: the parameters of the Lagrangian, as sympy symbols (e.g.: [l, g])
+    :param forces: the generalized non-conservative forces, one per coordinate (e.g.: [-d*th(t).diff(t)]). If None, no forces
+    :param name: name of the model, used for the cached file
+    :param cache_dir: folder of the cached models. Defaults to $PENDULUM_CACHE, or ~/.cache/pendulum
+    :returns: the model
+    """
+
+    import sympy as sp
+
+    ## Avoid wrong inputs
+    names = [str(p) for p in params]
+    if any(not n.isidentifier() or keyword.iskeyword(n) or _RESERVED.match(n) for n in names):
+        raise ValueError('Wrong parameters (params). Expected symbols with valid and unreserved names')
+
+    if forces is None:
+        forces = [0]*len(coords)
+    if len(forces) != len(coords): # One generalized force per coordinate
+        raise ValueError('Wrong generalized forces (forces). Expected one per coordinate')
+
+    ## Look for a cached version
+    cache_dir = cache_dir or os.environ.get('PENDULUM_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'pendulum'))
+    key = sp.srepr((lagrangian, tuple(coords), t, tuple(params), tuple(forces))) + _VERSION
+    path = os.path.join(cache_dir, '{}_{}.py'.format(name, hashlib.sha256(key.encode()).hexdigest()[:16]))
+
+    if not os.path.exists(path):
+        source = _generate(lagrangian, coords, t, params, forces)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            f.write(source)
+        os.replace(tmp_path, path) # Atomic, so concurrent builds are safe
+
+    return Model(path, len(coords), names)
+
+class Model():
+    """Compiled model, as returned by build_model
+
+    :param path: the generated module
+    :param n: number of degrees of freedom
+    :param params: names of the parameters
+    """
+
+    def __init__(self, path, n, params):
+        spec = importlib.util.spec_from_file_location('pendulum_model_' + os.path.basename(path)[:-3], path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        self.path = path
+        self.n = n
+        self.params = params
+        self.rhs = module.rhs
+        self.jac = module.jac
+
+    def derivative(self, state, t=0, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, h=1e-4, **params):
+        """Returns the dynamical equation
+
+        :param state: the state (q_1, w_1, q_2, w_2, ...)
+        :param t: the time
+        :param pivot_x: the horizontal position of the pivot
+        :type pivot_x: function of time, constant or Schedule
+        :param pivot_y: the vertical position of the pivot
+        :type pivot_y: function of time, constant or Schedule
+        :param is_acceleration: set to True to input pivot accelerations instead of positions
+        :type is_acceleration: boolean
+        :param h: numerical step for computing numerical derivatives
+        :param ``**params``: the values of the model's parameters
+        :returns: the time derivative (dydt)
+        """
+
+        accel_x, accel_y = _format_accelerations(pivot_x, pivot_y, is_acceleration, h)
+        values = self._format_params(params)
+
+        return self.rhs(state, t, accel_x(t), accel_y(t), *values)
+
+    def simulate(self, yinit, ts, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, h=1e-4, reducers=None, **kwargs):
+        """Returns the timeseries of the simulated model
+
+        The analytical jacobian is passed to the integrator.
+
+        :param yinit: initial conditions (q_1, w_1, q_2, w_2, ...)
+        :param ts: integration times
+        :param pivot_x: the horizontal position of the pivot
+        :type pivot_x: function of time, constant or Schedule
+        :param pivot_y: the vertical position of the pivot
+        :type pivot_y: function of time, constant or Schedule
+        :param is_acceleration: set to True to input pivot accelerations instead of positions
+        :type is_acceleration: boolean
+        :param h: numerical step for computing numerical derivatives
+        :param reducers: dictionary of reducers (see pendulum.reducers). If given, only their results are returned
+        :param ``**kwargs``: the values of the model's parameters, and odeint keyword arguments
+        :returns: the simulation's timeseries
+        """
+
+        ## Avoid wrong inputs
+        if (len(yinit) != 2*self.n): # A coordinate and a speed per degree of freedom
+            raise ValueError('Wrong initial condition (yinit). Expected {}-elements vector'.format(2*self.n))
+
+        ## Set the problem
+        params = {name: kwargs.pop(name) for name in self.params if name in kwargs}
+        values = self._format_params(params)
+        accel_x, accel_y = _format_accelerations(pivot_x, pivot_y, is_acceleration, h)
+
+        f = lambda state, t : self.rhs(state, t, accel_x(t), accel_y(t), *values)
+        kwargs.setdefault('Dfun', lambda state, t : self.jac(state, t, accel_x(t), accel_y(t), *values))
+
+        ## Solve it
+        breaks = _discontinuities(pivot_x, pivot_y)
+        if reducers is not None:
+            return _reduce(_isolve(f, yinit, ts, breaks, chunk=1000, **kwargs), reducers, (2*self.n,))
+
+        return _solve(f, yinit, ts, breaks, **kwargs)
+
+    def _format_params(self, params):
+        """ Returns the parameters' values, in order
+        """
+
+        missing = [name for name in self.params if name not in params]
+        if missing:
+            raise ValueError('Wrong parameters. Missing values for {}'.format(missing))
+
+        return [params[name] for name in self.params]
+
+def _generate(lagrangian, coords, t, params, forces):
+    """ Returns the source code of a model derived from its Lagrangian
+
+    :param lagrangian: sympy expression of the Lagrangian
+    :param coords: the generalized coordinates, as sympy functions of t
+    :param t: sympy symbol for the time
+    :param params: the parameters, as sympy symbols
+    :param forces: the generalized non-conservative forces
+    :returns: the source code, defining rhs(state, t, accel_x, accel_y, *params) and jac(...)
+    """
+
+    import sympy as sp
+
+    n = len(coords)
+    qs = sp.symbols('q0:{}'.format(n))
+    ws = sp.symbols('w0:{}'.format(n))
+    qdds = sp.symbols('qdd0:{}'.format(n))
+    ax, ay = sp.symbols('accel_x accel_y')
+    X, Y = pivot(t)
+
+    ## Euler-Lagrange equations
+    eqs = [sp.diff(sp.diff(lagrangian, q.diff(t)), t) - sp.diff(lagrangian, q) - Q for q, Q in zip(coords, forces)]
+
+    ## Replace the functions of time by plain symbols (higher derivatives first)
+    subs = [(X.diff(t, 2), ax), (Y.diff(t, 2), ay)]
+    subs += [(q.diff(t, 2), qdd) for q, qdd in zip(coords, qdds)]
+    subs += [(q.diff(t), w) for q, w in zip(coords, ws)]
+    subs += [(q, s) for q, s in zip(coords, qs)]
+    eqs = [sp.expand(eq.subs(subs)) for eq in eqs]
+
+    if any(eq.has(X) or eq.has(Y) for eq in eqs):
+        raise ValueError('Wrong Lagrangian. The dynamics should only depend on the pivot through its acceleration')
+
+    ## Solve for the accelerations
+    A, b = sp.linear_eq_to_matrix(eqs, qdds)
+    A = A.applyfunc(sp.trigsimp) # The mass matrix usually simplifies a lot
+    accels = A.LUsolve(b)
+
+    state = [s for pair in zip(qs, ws) for s in pair]
+    dydt = [e for pair in zip(ws, accels) for e in pair]
+    jac = sp.Matrix(dydt).jacobian(state)
+
+    ## Common subexpression elimination
+    header = ', '.join(['state, t, accel_x, accel_y'] + [str(p) for p in params])
+    unpack = '    {}, = state'.format(', '.join(str(s) for s in state))
+
+    lines = ['# Generated by pendulum.builder. Do not edit',
+             'import numpy',
+             '',
+             'def rhs({}):'.format(header),
+             unpack]
+    body, (values,) = _cse([sp.Matrix(dydt)])
+    lines += body + ['    return [{}]'.format(', '.join(values)),
+                     '',
+                     'def jac({}):'.format(header),
+                     unpack]
+    body, (values,) = _cse([jac])
+    rows = [', '.join(values[2*n*i:2*n*(i + 1)]) for i in range(2*n)]
+    lines += body + ['    return numpy.array([{}], dtype=float)'.format(', '.join('[{}]'.format(r) for r in rows)),
+                     '']
+
+    return '\n'.join(lines)
+
+def _cse(exprs):
+    """ Returns the numpy code of a set of expressions, after common subexpression elimination
+
+    :param exprs: list of sympy matrices
+    :returns: the lines computing the subexpressions, and the code of each element of each matrix
+    """
+
+    import sympy as sp
+    from sympy.printing.numpy import NumPyPrinter
+
+    printer = NumPyPrinter({'fully_qualified_modules': True})
+    replacements, reduced = sp.cse(exprs, symbols=sp.numbered_symbols('_x'))
+
+    body = ['    {} = {}'.format(s, printer.doprint(e)) for s, e in replacements]
+    values = [[printer.doprint(e) for e in matrix] for matrix in reduced]
+
+    return body, values
@@ -0,0 +1,126 @@
+import os
+import pickle
+import numpy as np
+from pendulum.models import pendulum, double_pendulum, pendulum_ensemble, double_pendulum_ensemble
+
+## A checkpoint is a folder with two files:
+## - sol.npy: the (memory-mapped) timeseries, filled up to the last checkpoint
+## - state.pkl: the solver, its arguments, and the progress. Replaced atomically
+##
+## The problem is always integrated in the same chunks, restarting the solver
+## from the last computed state, so a resumed simulation is bit-for-bit
+## identical to an uninterrupted one.
+
+_SOLVERS = {f.__name__: f for f in (pendulum, double_pendulum, pendulum_ensemble, double_pendulum_ensemble)}
+
+def checkpointed(solver, yinit, ts, path, every=1000, **kwargs):
+    """Runs a simulation, checkpointing it to disk periodically
+
+    If the run is interrupted, it can be continued with resume.
+
+    :param solver: pendulum, double_pendulum, or one of their ensemble forms
+    :param yinit: initial conditions
+    :param ts: integration times
+    :param path: folder where the checkpoints are stored
+    :param every: number of integration times between checkpoints
+    :param ``**kwargs``: keyword arguments of the solver. Those that can't be pickled (such as lambda functions) are not stored, and have to be passed again to resume
+    :returns: the simulation's timeseries
+    """
+
+    ## Avoid wrong inputs
+    name = getattr(solver, '__name__', solver)
+    if name not in _SOLVERS:
+        raise ValueError('Wrong solver. Use one of {}'.format(sorted(_SOLVERS)))
+
+    if (every < 1): # At least one time per chunk
+        raise ValueError('Wrong checkpoint period (every). Expected a positive integer')
+
+    if 'reducers' in kwargs: # Reducers don't produce a timeseries
+        raise ValueError('Reducers are not supported by checkpointed simulations')
+
+    stored = {key: value for key, value in kwargs.items() if _is_picklable(value)}
+    state = {'solver': name,
+             'ts': np.asarray(ts, dtype=float),
+             'every': every,
+             'index': 0, # Number of integration times already computed
+             'y': np.asarray(yinit, dtype=float),
+             'kwargs': stored,
+             'missing': sorted(set(kwargs) - set(stored))}
+
+    os.makedirs(path, exist_ok=True)
+    _save(state, path)
+
+    return _run(state, path, kwargs)
+
+def resume(path, **kwargs):
+    """Continues a checkpointed simulation from its last checkpoint
+
+    :param path: folder where the checkpoints are stored
+    :param ``**kwargs``: keyword arguments of the solver that couldn't be stored (such as lambda functions). They override the stored ones
+    :returns: the simulation's timeseries
+    """
+
+    with open(os.path.join(path, 'state.pkl'), 'rb') as f:
+        state = pickle.load(f)
+
+    missing = [key for key in state['missing'] if key not in kwargs]
+    if missing:
+        raise ValueError('Wrong arguments. The following ones were not stored, and must be passed again: {}'.format(missing))
+
+    return _run(state, path, dict(state['kwargs'], **kwargs))
+
+def _run(state, path, kwargs):
+    """ Integrates a checkpointed simulation until its end
+
+    :param state: the progress of the simulation
+    :param path: folder where the checkpoints are stored
+    :param kwargs: keyword arguments of the solver
+    :returns: the simulation's timeseries
+    """
+
+    solver = _SOLVERS[state['solver']]
+    ts, every = state['ts'], state['every']
+    i, y = state['index'], state['y']
+    sol_path = os.path.join(path, 'sol.npy')
+    sol = np.load(sol_path, mmap_mode='r+') if i > 0 else None
+
+    while i < len(ts):
+        ## The chunks overlap in one time, whose state is already known
+        if i == 0:
+            out = solver(y, ts[:every], **kwargs)
+        else:
+            out = solver(y, ts[i-1:i+every], **kwargs)[1:]
+
+        if sol is None:
+            sol = np.lib.format.open_memmap(sol_path, mode='w+', dtype=np.float64, shape=(len(ts),) + out.shape[1:])
+
+        ## Save the data before the progress
+        sol[i:i+len(out)] = out
+        sol.flush()
+        i, y = i + len(out), out[-1]
+        state.update(index=i, y=y)
+        _save(state, path)
+
+    return np.array(sol)
+
+def _save(state, path):
+    """ Writes the progress of a simulation atomically
+    """
+
+    tmp_path = os.path.join(path, 'state.pkl.tmp')
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(path, 'state.pkl'))
+
+def _is_picklable(value):
+    """ Returns True if the value can be stored in a checkpoint
+    """
+
+    try:
+        pickle.dumps(value)
+    except Exception:
+        return False
+
+    return True
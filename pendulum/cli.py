@@ -0,0 +1,232 @@
+import argparse
+import ast
+import json
+import sys
+
+## Heavy modules (numpy, scipy, matplotlib) are only imported by the
+## subcommands needing them, so the command starts fast
+
+def main(argv=None):
+    """Entry point of the pendulum command
+
+    :param argv: command line arguments. If None, sys.argv is used
+    :returns: the exit code
+    """
+
+    parser = argparse.ArgumentParser(prog='pendulum', description='Mechanical simulation of non-inertial simple and double pendula')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    run_parser = subparsers.add_parser('run', help='run the simulation jobs described in one or more config files')
+    run_parser.add_argument('configs', nargs='+', help='json config files')
+    run_parser.add_argument('-q', '--quiet', action='store_true', help='do not report progress')
+    run_parser.set_defaults(func=_run)
+
+    convert_parser = subparsers.add_parser('convert', help='convert a csv pivot log into a memory-mapped binary file')
+    convert_parser.add_argument('csv', help='csv log')
+    convert_parser.add_argument('out', help='binary file to create (.npy)')
+    convert_parser.add_argument('--columns', default='t,x,y', help='time and position columns (default: t,x,y)')
+    convert_parser.set_defaults(func=_convert)
+
+    args = parser.parse_args(argv)
+    try:
+        args.func(args)
+    except (ValueError, OSError) as e:
+        print('pendulum: error: {}'.format(e), file=sys.stderr)
+        return 1
+
+    return 0
+
+def run_jobs(jobs, log=None):
+    """Runs a batch of simulation jobs, and writes their results
+
+    Each job is a dictionary with the following keys:
+
+    - model: 'pendulum' or 'double_pendulum'
+    - yinit: initial conditions
+    - ts: integration times, as a list or as {'start': ..., 'stop': ..., 'num': ...}
+    - params: keyword arguments of the model (e.g.: l, g, d, m)
+    - pivot (optional): {'x': ..., 'y': ..., 'is_acceleration': ...}, where the positions are constants or expressions of t (e.g.: 'np.arctan(5*t)'), or {'log': 'file.npy', 'kind': 'cubic'} for a converted pivot log
+    - output: .npz file where the result is stored
+    - name (optional): key of the result in the output file (unique within it). The times are stored as name_ts
+
+    The pivot expressions may only use t, numbers, arithmetic operators, numpy
+    constants (e.g.: np.pi) and numpy ufuncs (e.g.: np.sin). Anything else is
+    rejected, so that a config file can't run arbitrary code.
+
+    All the jobs are validated before any of them is integrated. Results sharing
+    the same output file are written together, once all the jobs are done (or,
+    if one of them fails, with the jobs finished until then).
+
+    :param jobs: list of jobs
+    :param log: function of one string reporting progress. If None, nothing is reported
+    :returns: a dictionary with the results of each output file
+    """
+
+    import numpy as np
+    from pendulum import models
+
+    solvers = {'pendulum': models.pendulum, 'double_pendulum': models.double_pendulum}
+
+    ## Avoid wrong inputs, before spending any time integrating
+    names = [job.get('name', 'job_{}'.format(i)) for i, job in enumerate(jobs)]
+    keys = {} # output -> keys of its arrays
+    for name, job in zip(names, jobs):
+        missing = [key for key in ('model', 'yinit', 'ts', 'output') if key not in job]
+        if missing:
+            raise ValueError('Missing {} in job {}'.format(missing, name))
+        if job['model'] not in solvers:
+            raise ValueError('Wrong model in job {}. Use one of {}'.format(name, sorted(solvers)))
+        if not str(job['output']).endswith('.npz'):
+            raise ValueError('Wrong output in job {}. Expected a .npz file'.format(name))
+        taken = keys.setdefault(job['output'], set())
+        if {name, name + '_ts'} & taken: # Would overwrite the result (or times) of another job
+            raise ValueError('Wrong name in job {}. It collides with another job of {}'.format(name, job['output']))
+        taken.update((name, name + '_ts'))
+        if isinstance(job['ts'], dict) and not {'start', 'stop'} <= set(job['ts']):
+            raise ValueError('Wrong times (ts) in job {}. Expected a list or {{"start": ..., "stop": ..., "num": ...}}'.format(name))
+        for axis in ('x', 'y'):
+            value = job.get('pivot', {}).get(axis)
+            if isinstance(value, str):
+                _compile(value, axis)
+
+    results = {}
+    try:
+        for name, job in zip(names, jobs):
+            ## Set the problem
+            ts = _format_times(job['ts'])
+            pivot_x, pivot_y, is_acceleration = _format_pivot(job.get('pivot', {}), ts)
+
+            ## Solve it
+            sol = solvers[job['model']](job['yinit'], ts, pivot_x, pivot_y, is_acceleration, **job.get('params', {}))
+
+            output = results.setdefault(job['output'], {})
+            output[name] = sol
+            output[name + '_ts'] = ts
+            if log is not None:
+                log('{} -> {}'.format(name, job['output']))
+    finally:
+        ## Write in bulk (also the finished jobs, if one failed)
+        for path, arrays in results.items():
+            np.savez(path, **arrays)
+
+    return results
+
+def _run(args):
+    """ Runs the run subcommand
+    """
+
+    jobs = []
+    for path in args.configs:
+        with open(path) as f:
+            config = json.load(f)
+
+        defaults = config.get('defaults', {})
+        for job in config.get('jobs', []):
+            jobs.append(_merge(defaults, job))
+
+    run_jobs(jobs, log=None if args.quiet else print)
+
+def _convert(args):
+    """ Runs the convert subcommand
+    """
+
+    from pendulum.pivotlog import convert
+
+    n = convert(args.csv, args.out, columns=tuple(args.columns.split(',')))
+    print('{} rows -> {}'.format(n, args.out))
+
+def _merge(defaults, job):
+    """ Returns a job with its missing entries taken from the defaults
+
+    Nested dictionaries (such as params and pivot) are merged too.
+    """
+
+    merged = dict(defaults)
+    for key, value in job.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = dict(merged[key], **value)
+        else:
+            merged[key] = value
+
+    return merged
+
+def _format_times(spec):
+    """ Returns the integration times described in a job
+
+    :param spec: a list of times, or {'start': ..., 'stop': ..., 'num': ...}
+    :returns: the integration times
+    """
+
+    import numpy as np
+
+    if isinstance(spec, dict):
+        return np.linspace(spec['start'], spec['stop'], spec.get('num', 1000))
+    else:
+        return np.asarray(spec, dtype=float)
+
+def _format_pivot(spec, ts):
+    """ Returns the pivot's movement described in a job
+
+    :param spec: the pivot's description
+    :param ts: integration times
+    :returns: pivot_x, pivot_y and is_acceleration
+    """
+
+    import numpy as np
+
+    is_acceleration = spec.get('is_acceleration', False)
+
+    if 'log' in spec: # Converted pivot log
+        from pendulum.pivotlog import PivotLog
+
+        pivots = PivotLog(spec['log']).pivot(ts[0], ts[-1], spec.get('kind', 'cubic')) + (0.0,)
+        return pivots[0], pivots[1], is_acceleration
+
+    pivots = []
+    for axis in ('x', 'y'):
+        value = spec.get(axis, 0.0)
+        if isinstance(value, str): # Expression of t
+            code = _compile(value, axis)
+            value = lambda t, code=code : eval(code, {'__builtins__': {}, 'np': np}, {'t': t})
+        pivots.append(value)
+
+    return pivots[0], pivots[1], is_acceleration
+
+def _compile(expression, axis):
+    """ Returns the compiled expression of the pivot's movement along an axis
+    """
+
+    try:
+        tree = ast.parse(expression, '<pivot {}>'.format(axis), 'eval')
+    except SyntaxError as e:
+        raise ValueError('Wrong pivot expression ({}): {}'.format(axis, e))
+
+    if not _is_allowed(tree.body):
+        raise ValueError('Wrong pivot expression ({}): {}. Use only t, numbers, arithmetic operators, numpy constants and numpy ufuncs'.format(axis, expression))
+
+    return compile(tree, '<pivot {}>'.format(axis), 'eval')
+
+_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.UAdd, ast.USub)
+
+def _is_allowed(node):
+    """ Returns True if a node of a pivot expression only uses t, numbers, arithmetic operators, numpy constants (e.g.: np.pi) and calls to numpy ufuncs (e.g.: np.sin)
+    """
+
+    import numpy as np
+
+    numpy_attribute = lambda node, kind : isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and (node.value.id == 'np') \
+                                          and not node.attr.startswith('_') and isinstance(getattr(np, node.attr, None), kind)
+
+    if isinstance(node, ast.BinOp):
+        return isinstance(node.op, _OPERATORS) and _is_allowed(node.left) and _is_allowed(node.right)
+    if isinstance(node, ast.UnaryOp):
+        return isinstance(node.op, _OPERATORS) and _is_allowed(node.operand)
+    if isinstance(node, ast.Constant):
+        return type(node.value) in (int, float)
+    if isinstance(node, ast.Name):
+        return node.id == 't'
+    if isinstance(node, ast.Call):
+        return numpy_attribute(node.func, np.ufunc) and not node.keywords and all(_is_allowed(arg) for arg in node.args)
+
+    return numpy_attribute(node, float)
@@ -0,0 +1,67 @@
+import numpy as np
+
+class Trajectory():
+    """Dense output of a simulation, that can be evaluated at any time
+
+    The trajectory is stored as the states and time derivatives at the steps
+    accepted by the integrator, and evaluated with piecewise cubic Hermite
+    interpolation. Repeated knots are allowed, and represent a jump of the
+    time derivative (e.g.: at a discontinuity of the pivot's acceleration).
+
+    :param ts: the times of the knots (non decreasing)
+    :param ys: the states at the knots
+    :param dydts: the time derivatives at the knots
+    :param shape: shape of the state returned at each time (e.g.: (n, 2) for an ensemble). Defaults to the shape of ys[0]
+    """
+
+    def __init__(self, ts, ys, dydts, shape=None):
+        self.ts = np.asarray(ts, dtype=float)
+        self.ys = np.asarray(ys, dtype=float)
+        self.dydts = np.asarray(dydts, dtype=float)
+        self.shape = tuple(shape) if shape is not None else self.ys.shape[1:]
+
+        ## Avoid wrong inputs
+        if (len(self.ts) < 2) or np.any(np.diff(self.ts) < 0):
+            raise ValueError('Wrong knots (ts). Expected at least two non decreasing times')
+
+        if (self.ys.shape != self.dydts.shape) or (len(self.ys) != len(self.ts)):
+            raise ValueError('Wrong knots. Expected a state and a time derivative per time')
+
+    def __call__(self, ts):
+        """Returns the states at the given times
+
+        :param ts: times, within the simulated interval
+        :returns: the timeseries, as returned by the solvers
+        """
+
+        ts = np.asarray(ts, dtype=float)
+        if np.any(ts < self.ts[0]) or np.any(ts > self.ts[-1]): # No extrapolation
+            raise ValueError('Wrong times (ts). Expected times within [{}, {}]'.format(self.ts[0], self.ts[-1]))
+
+        ## Locate the interval of each time
+        i = np.clip(np.searchsorted(self.ts, ts, side='right') - 1, 0, len(self.ts) - 2)
+        h = self.ts[i+1] - self.ts[i]
+        s = np.divide(ts - self.ts[i], h, out=np.zeros_like(h), where=(h > 0))
+
+        ## Cubic Hermite basis
+        s, h = s[..., None], h[..., None]
+        h00 = (1 + 2*s)*(1 - s)**2
+        h10 = s*(1 - s)**2
+        h01 = s**2*(3 - 2*s)
+        h11 = s**2*(s - 1)
+
+        ys = h00*self.ys[i] + h10*h*self.dydts[i] + h01*self.ys[i+1] + h11*h*self.dydts[i+1]
+
+        return ys.reshape(ts.shape + self.shape)
+
+    @property
+    def span(self):
+        """The simulated interval
+        """
+        return self.ts[0], self.ts[-1]
+
+    @property
+    def nbytes(self):
+        """Memory used by the trajectory, in bytes
+        """
+        return self.ts.nbytes + self.ys.nbytes + self.dydts.nbytes
@@ -0,0 +1,309 @@
+import numpy as np
+
+## Vectorized environments for reinforcement learning.
+## The action is the pivot's acceleration, held constant during each step.
+## All the environments are advanced at once with a fixed-step Runge-Kutta 4
+## method, written in-place over preallocated buffers. The states are stored
+## as (n_variables, num_envs), so each variable is a contiguous row.
+
+class VecEnv():
+    """Base class of the vectorized environments
+
+    Subclasses define the number of state variables (size) and the dynamical
+    equation (_rhs), that writes the time derivative into a buffer.
+
+    The arrays returned by reset and step are reused buffers, overwritten at
+    every call (copy them if they have to be kept). Steps allocate no new
+    arrays, except when some environments are reset.
+
+    Terminated or truncated environments are reset automatically. Their last
+    observation is available at final_obs.
+
+    :param num_envs: number of environments
+    :param dt: duration of each step
+    :param substeps: number of integration steps per step
+    :param max_steps: number of steps after which an environment is truncated
+    :param max_action: maximum absolute pivot acceleration. If None, the actions are not clipped
+    :param reward: function of (obs, actions) returning one reward per environment. Defaults to the height of the pendula (-cos of the angles)
+    :param terminate: function of obs returning one boolean per environment. If None, the environments are only truncated
+    :param low: lower bound of the random initial states (constant, or one per state variable)
+    :param high: upper bound of the random initial states (constant, or one per state variable)
+    :param seed: seed of the random initial states
+    """
+
+    size = None
+
+    def __init__(self, num_envs, dt=0.01, substeps=1, max_steps=500, max_action=None, reward=None, terminate=None, low=-0.05, high=0.05, seed=None):
+
+        ## Avoid wrong inputs
+        if (num_envs < 1) or (substeps < 1) or (max_steps < 1):
+            raise ValueError('Wrong sizes. Expected num_envs, substeps and max_steps >= 1')
+
+        if (dt <= 0.0): # The step has to be positive
+            raise ValueError('Wrong step (dt). Expected a positive float')
+
+        self.num_envs = num_envs
+        self.h = dt / substeps
+        self.substeps = substeps
+        self.max_steps = max_steps
+        self.max_action = max_action
+        self.reward = reward
+        self.terminate = terminate
+        self.low = np.broadcast_to(np.asarray(low, dtype=float), (self.size,))
+        self.high = np.broadcast_to(np.asarray(high, dtype=float), (self.size,))
+        self.rng = np.random.default_rng(seed)
+
+        ## Returned buffers
+        self.obs = np.zeros((num_envs, self.size))
+        self.final_obs = np.zeros((num_envs, self.size))
+        self.rewards = np.zeros(num_envs)
+        self.terminated = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+        self.steps = np.zeros(num_envs, dtype=int)
+
+        ## Internal buffers
+        self.state = np.zeros((self.size, num_envs))
+        self.ks = np.zeros((4, self.size, num_envs)) # Runge-Kutta stages
+        self.tmp = np.zeros((self.size, num_envs))
+        self.work = np.zeros((8, num_envs)) # Scratch rows for the dynamical equation
+        self.ax = np.zeros(num_envs)
+        self.gy = np.zeros(num_envs) # Gravity plus vertical acceleration
+        self.done = np.zeros(num_envs, dtype=bool)
+
+    def reset(self, seed=None):
+        """Resets all the environments
+
+        :param seed: if given, re-seeds the random initial states
+        :returns: the observations, with shape (num_envs, size)
+        """
+
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+
+        self.done.fill(True)
+        self._reset_done()
+        np.copyto(self.obs, self.state.T)
+
+        return self.obs
+
+    def step(self, actions):
+        """Advances all the environments one step
+
+        :param actions: the pivot accelerations. Either (num_envs,) horizontal accelerations, or (num_envs, 2) horizontal and vertical ones
+        :returns: obs, rewards, terminated and truncated (one row or value per environment)
+        """
+
+        ## Avoid wrong inputs
+        actions = np.asarray(actions, dtype=float)
+        if actions.shape not in ((self.num_envs,), (self.num_envs, 2)):
+            raise ValueError('Wrong actions. Expected a (num_envs,) or (num_envs, 2) array')
+
+        ## The pivot's acceleration, held during the step
+        if actions.ndim == 1:
+            np.copyto(self.ax, actions)
+            self.gy.fill(0.0)
+        else:
+            np.copyto(self.ax, actions[:, 0])
+            np.copyto(self.gy, actions[:, 1])
+        if self.max_action is not None:
+            np.clip(self.ax, -self.max_action, self.max_action, out=self.ax)
+            np.clip(self.gy, -self.max_action, self.max_action, out=self.gy)
+        np.add(self.gy, self.g, out=self.gy)
+
+        for _ in range(self.substeps):
+            self._rk4()
+        np.copyto(self.obs, self.state.T)
+        self.steps += 1
+
+        ## Rewards and termination
+        if self.reward is None:
+            self._height(self.rewards)
+        else:
+            np.copyto(self.rewards, self.reward(self.obs, actions))
+        if self.terminate is None:
+            self.terminated.fill(False)
+        else:
+            np.copyto(self.terminated, self.terminate(self.obs))
+        np.greater_equal(self.steps, self.max_steps, out=self.truncated)
+
+        ## Automatic resets
+        np.logical_or(self.terminated, self.truncated, out=self.done)
+        if self.done.any():
+            self.final_obs[self.done] = self.obs[self.done]
+            self._reset_done()
+            self.obs[self.done] = self.state.T[self.done]
+
+        return self.obs, self.rewards, self.terminated, self.truncated
+
+    def _reset_done(self):
+        """ Draws new initial states for the environments marked as done
+        """
+
+        k = np.count_nonzero(self.done)
+        self.state[:, self.done] = self.rng.uniform(self.low, self.high, size=(k, self.size)).T
+        self.steps[self.done] = 0
+
+    def _rk4(self):
+        """ Advances the states one Runge-Kutta 4 step, in place
+        """
+
+        y, tmp, (k1, k2, k3, k4), h = self.state, self.tmp, self.ks, self.h
+
+        self._rhs(y, k1)
+        np.multiply(k1, h/2, out=tmp)
+        np.add(tmp, y, out=tmp)
+        self._rhs(tmp, k2)
+        np.multiply(k2, h/2, out=tmp)
+        np.add(tmp, y, out=tmp)
+        self._rhs(tmp, k3)
+        np.multiply(k3, h, out=tmp)
+        np.add(tmp, y, out=tmp)
+        self._rhs(tmp, k4)
+
+        ## y += h/6 * (k1 + 2*k2 + 2*k3 + k4)
+        np.add(k2, k3, out=k2)
+        np.multiply(k2, 2, out=k2)
+        np.add(k1, k2, out=k1)
+        np.add(k1, k4, out=k1)
+        np.multiply(k1, h/6, out=k1)
+        np.add(y, k1, out=y)
+
+    def _height(self, out):
+        """ Writes the height of the pendula (-cos of the angles) into out
+        """
+
+        np.cos(self.obs[:, 0], out=out)
+        for i in range(2, self.size, 2):
+            np.cos(self.obs[:, i], out=self.work[0])
+            np.add(out, self.work[0], out=out)
+        np.negative(out, out=out)
+
+    def _rhs(self, y, out):
+        """ Writes the time derivative of the states y into out
+        """
+        raise NotImplementedError
+
+class PendulumVecEnv(VecEnv):
+    """Vectorized environments of non inertial pendula (see pendulum.models.dpendulum)
+
+    The observations are the states (th, w).
+
+    :param num_envs: number of environments
+    :param l: the pendulum's length (constant, or one per environment)
+    :param g: the local acceleration of gravity (constant, or one per environment)
+    :param d: the damping constant (constant, or one per environment)
+    :param ``**kwargs``: VecEnv keyword arguments
+    """
+
+    size = 2
+
+    def __init__(self, num_envs, l=1.0, g=9.8, d=0.0, **kwargs):
+        super().__init__(num_envs, **kwargs)
+
+        ## Avoid wrong inputs
+        if np.any(np.less_equal(l, 0.0)): # Negative or zero lengths don't make sense
+            raise ValueError('Wrong pendulum length (l). Expected positive float')
+
+        if np.any(np.less(d, 0.0)): # A negative damping constant doesn't make sense
+            raise ValueError('Wrong damping constant (d). Expected zero or positive float')
+
+        self.l, self.g, self.d = [np.broadcast_to(np.asarray(p, dtype=float), (num_envs,)) for p in (l, g, d)]
+
+    def _rhs(self, y, out):
+        ## dw = -((g + ay) sin(th) + ax cos(th)) / l - d w
+        th, w = y
+        s, c = self.work[0], self.work[1]
+
+        np.copyto(out[0], w)
+        np.sin(th, out=s)
+        np.cos(th, out=c)
+        np.multiply(s, self.gy, out=s)
+        np.multiply(c, self.ax, out=c)
+        np.add(s, c, out=s)
+        np.divide(s, self.l, out=s)
+        np.multiply(self.d, w, out=c)
+        np.add(s, c, out=s)
+        np.negative(s, out=out[1])
+
+class DoublePendulumVecEnv(VecEnv):
+    """Vectorized environments of non inertial double pendula (see pendulum.models.ddouble_pendulum)
+
+    The observations are the states (th_1, w_1, th_2, w_2).
+
+    :param num_envs: number of environments
+    :param m: the mass of each pendula, as (m_1, m_2). Each of them can be a constant, or one value per environment
+    :param l: the length of each pendula, as (l_1, l_2). Each of them can be a constant, or one value per environment
+    :param g: the local acceleration of gravity (constant, or one per environment)
+    :param ``**kwargs``: VecEnv keyword arguments
+    """
+
+    size = 4
+
+    def __init__(self, num_envs, m=(1, 1), l=(1, 1), g=9.8, **kwargs):
+        super().__init__(num_envs, **kwargs)
+
+        ## Avoid wrong inputs
+        if (len(m) != 2) or np.any(np.less_equal(m[0], 0.0)) or np.any(np.less_equal(m[1], 0.0)):
+            raise ValueError('Wrong pendulum masses (m). Expected 2 positive floats')
+
+        if (len(l) != 2) or np.any(np.less_equal(l[0], 0.0)) or np.any(np.less_equal(l[1], 0.0)):
+            raise ValueError('Wrong pendulum lengths (l). Expected 2 positive floats')
+
+        self.m1, self.m2, self.l1, self.l2, self.g = [np.broadcast_to(np.asarray(p, dtype=float), (num_envs,)) for p in (*m, *l, g)]
+        self.M = self.m1 + self.m2
+        self.m2l1, self.m2l2, self.Mm2 = self.m2*self.l1, self.m2*self.l2, self.M/self.m2
+
+    def _rhs(self, y, out):
+        ## With G1 = F1/l1, G2 = F2/l2 and q = m1 + m2 sin(th1 - th2)**2
+        ## (see ddouble_pendulum), the angular accelerations are
+        ## dw1 = (G1 - cos(th1 - th2) G2) / (l1 q)
+        ## dw2 = (M/m2 G2 - cos(th1 - th2) G1) / (l2 q)
+        th1, w1, th2, w2 = y
+        sd, cd, q, G1, G2, u, v = self.work[:7]
+
+        np.copyto(out[0], w1)
+        np.copyto(out[2], w2)
+
+        np.subtract(th1, th2, out=u)
+        np.sin(u, out=sd)
+        np.cos(u, out=cd)
+        np.multiply(sd, sd, out=q)
+        np.multiply(q, self.m2, out=q)
+        np.add(q, self.m1, out=q)
+
+        ## G1 = -m2 l2 sd w2**2 - M ((g + ay) sin(th1) + ax cos(th1))
+        np.sin(th1, out=u)
+        np.multiply(u, self.gy, out=u)
+        np.cos(th1, out=v)
+        np.multiply(v, self.ax, out=v)
+        np.add(u, v, out=u)
+        np.multiply(u, self.M, out=G1)
+        np.multiply(w2, w2, out=v)
+        np.multiply(v, sd, out=v)
+        np.multiply(v, self.m2l2, out=v)
+        np.add(G1, v, out=G1)
+        np.negative(G1, out=G1)
+
+        ## G2 = m2 l1 sd w1**2 - m2 ((g + ay) sin(th2) + ax cos(th2))
+        np.sin(th2, out=u)
+        np.multiply(u, self.gy, out=u)
+        np.cos(th2, out=v)
+        np.multiply(v, self.ax, out=v)
+        np.add(u, v, out=u)
+        np.multiply(u, self.m2, out=G2)
+        np.multiply(w1, w1, out=v)
+        np.multiply(v, sd, out=v)
+        np.multiply(v, self.m2l1, out=v)
+        np.subtract(v, G2, out=G2)
+
+        ## Angular accelerations
+        np.multiply(cd, G2, out=u)
+        np.subtract(G1, u, out=u)
+        np.multiply(self.l1, q, out=v)
+        np.divide(u, v, out=out[1])
+
+        np.multiply(cd, G1, out=u)
+        np.multiply(G2, self.Mm2, out=v)
+        np.subtract(v, u, out=u)
+        np.multiply(self.l2, q, out=v)
+        np.divide(u, v, out=out[3])
@@ -0,0 +1,128 @@
+import numpy as np
+from pendulum.models import ddouble_pendulum
+
+def lyapunov_spectrum(yinits, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, m=(1, 1), l=(1, 1), g=9.8, h=1e-4, t0=0.0, dt=1e-2, renorm=10, t_max=1000.0, check=10.0, tol=1e-3, eps=1e-7):
+    """Returns the Lyapunov spectra of an ensemble of double pendula
+
+    The tangent dynamics are integrated alongside the states (with a fixed
+    step Runge-Kutta 4 method), and re-orthonormalized periodically with a QR
+    decomposition. The product of the jacobian and the tangent vectors is
+    computed with central finite differences.
+
+    All the initial conditions (and parameter sets) are integrated as a single
+    vectorized batch. Those whose spectrum has converged are removed from the
+    batch.
+
+    :param yinits: initial conditions, one (th_1, w_1, th_2, w_2) row per double pendulum
+    :param pivot_x: the horizontal position of the pivot
+    :type pivot_x: function of time or constant
+    :param pivot_y: the vertical position of the pivot
+    :type pivot_y: function of time or constant
+    :param is_acceleration: set to True to input pivot accelerations instead of positions
+    :type is_acceleration: boolean
+    :param m: the mass of each pendula, as (m_1, m_2). Each of them can be a constant, or one value per initial condition
+    :param l: the length of each pendula, as (l_1, l_2). Each of them can be a constant, or one value per initial condition
+    :param g: the local acceleration of gravity (constant, or one per initial condition)
+    :param h: numerical step for computing numerical derivatives
+    :param t0: initial time
+    :param dt: integration step
+    :param renorm: number of steps between re-orthonormalizations
+    :param t_max: maximum integration time
+    :param check: time between convergence checks
+    :param tol: maximum change of the exponents between convergence checks
+    :param eps: step of the finite differences
+    :returns: spectra (one row of 4 exponents per initial condition, in decreasing order) and ts (integration time used by each of them)
+    """
+
+    ## Avoid wrong inputs
+    yinits = np.atleast_2d(np.asarray(yinits, dtype=float))
+    if (yinits.shape[1] != 4): # One (th_1, w_1, th_2, w_2) per double pendulum
+        raise ValueError('Wrong initial conditions (yinits). Expected a (n, 4) array')
+
+    if (dt <= 0.0) or (renorm < 1) or (check < dt*renorm):
+        raise ValueError('Wrong steps. Expected dt > 0, renorm >= 1 and check >= dt*renorm')
+
+    ## Parameters, one per initial condition
+    n = len(yinits)
+    m = np.stack([np.broadcast_to(np.asarray(mi, dtype=float), (n,)) for mi in m])
+    l = np.stack([np.broadcast_to(np.asarray(li, dtype=float), (n,)) for li in l])
+    g = np.broadcast_to(np.asarray(g, dtype=float), (n,))
+
+    ys = yinits.copy()
+    Qs = np.tile(np.eye(4), (n, 1, 1)) # Tangent vectors, as columns
+    logs = np.zeros((n, 4))
+    spectra = np.full((n, 4), np.nan)
+    ts = np.zeros(n)
+    previous = np.full((n, 4), np.nan) # Estimates at the last check
+    active = np.arange(n)
+
+    blocks_per_check = int(round(check / (dt*renorm)))
+    t, steps, block = t0, 0, 0
+    while len(active) and (t - t0 < t_max):
+        ## Integrate the active members during one block
+        y, Q = ys[active], Qs[active]
+        params = (m[:, active], l[:, active], g[active])
+        for _ in range(renorm):
+            y, Q = _rk4_step(y, Q, t, dt, params, pivot_x, pivot_y, is_acceleration, h, eps)
+            steps += 1
+            t = t0 + steps*dt
+
+        ## Re-orthonormalize
+        Q, R = np.linalg.qr(Q)
+        logs[active] += np.log(np.abs(np.diagonal(R, axis1=1, axis2=2)))
+        ys[active], Qs[active] = y, Q
+        block += 1
+
+        ## Check convergence
+        if block % blocks_per_check == 0:
+            estimates = logs[active] / (t - t0)
+            converged = np.max(np.abs(estimates - previous[active]), axis=1) < tol
+            previous[active] = estimates
+
+            done = active[converged]
+            spectra[done], ts[done] = estimates[converged], t - t0
+            active = active[~converged]
+
+    ## Unconverged members keep their last estimate
+    if len(active):
+        spectra[active], ts[active] = logs[active] / (t - t0), t - t0
+
+    return -np.sort(-spectra, axis=1), ts
+
+def _rk4_step(y, Q, t, dt, params, pivot_x, pivot_y, is_acceleration, h, eps):
+    """ Advances the states and their tangent vectors one Runge-Kutta 4 step
+    """
+
+    f = lambda y, Q, t : _tangent_rhs(y, Q, t, params, pivot_x, pivot_y, is_acceleration, h, eps)
+
+    k1y, k1Q = f(y, Q, t)
+    k2y, k2Q = f(y + dt/2*k1y, Q + dt/2*k1Q, t + dt/2)
+    k3y, k3Q = f(y + dt/2*k2y, Q + dt/2*k2Q, t + dt/2)
+    k4y, k4Q = f(y + dt*k3y, Q + dt*k3Q, t + dt)
+
+    return y + dt/6*(k1y + 2*k2y + 2*k3y + k4y), Q + dt/6*(k1Q + 2*k2Q + 2*k3Q + k4Q)
+
+def _tangent_rhs(y, Q, t, params, pivot_x, pivot_y, is_acceleration, h, eps):
+    """ Returns the time derivatives of a batch of states and of their tangent vectors
+
+    :param y: states, with shape (n, 4)
+    :param Q: tangent vectors (as columns), with shape (n, 4, 4)
+    :returns: dydt, with shape (n, 4), and dQdt, with shape (n, 4, 4)
+    """
+
+    m, l, g = params
+    f = lambda y, m, l, g : np.transpose(ddouble_pendulum(y.T, t, pivot_x, pivot_y, is_acceleration, m, l, g, h))
+
+    ## Jacobian times each tangent vector, by central differences
+    ## The states and their shifts are evaluated in a single batch
+    n = len(y)
+    shifts = eps * np.transpose(Q, (0, 2, 1)).reshape(4*n, 4)
+    ys = np.repeat(y, 4, axis=0)
+    batch = np.concatenate((y, ys + shifts, ys - shifts))
+    m, l, g = [np.concatenate((p, np.repeat(p, 4, axis=-1), np.repeat(p, 4, axis=-1)), axis=-1) for p in (m, l, g)]
+
+    out = f(batch, m, l, g)
+    dydt = out[:n]
+    JQ = (out[n:5*n] - out[5*n:]) / (2*eps)
+
+    return dydt, np.transpose(JQ.reshape(n, 4, 4), (0, 2, 1))
@@ -1,5 +1,7 @@
 import numpy as np
-from scipy.integrate import odeint
+from scipy.integrate import odeint, solve_ivp
+from pendulum.schedules import Schedule
+from pendulum.dense import Trajectory
 
 def dpendulum(state, t=0, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, l=1.0, g=9.8, d=0.0, h=1e-4):
     """Returns the dynamical equation of a non inertial pendulum
@@ -21,10 +23,10 @@ def dpendulum(state, t=0, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, l=1.0
     """
 
     ## Avoid wrong inputs
-    if (l <= 0.0): # Negative or zero lengths don't make sense
+    if np.any(np.less_equal(l, 0.0)): # Negative or zero lengths don't make sense
         raise ValueError('Wrong pendulum length (l). Expected positive float')
 
-    if (d < 0.0): # A negative damping constant doesn't make sense
+    if np.any(np.less(d, 0.0)): # A negative damping constant doesn't make sense
         raise ValueError('Wrong damping constant (d). Expected zero or positive float')
 
     if (h <= 0.0): # The numerical step for differentiation has to be positive
@@ -40,7 +42,7 @@ def dpendulum(state, t=0, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, l=1.0
 
     return dydt
 
-def pendulum(yinit, ts, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, l=1.0, g=9.8, d=0.0, h=1e-4, **kwargs):
+def pendulum(yinit, ts, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, l=1.0, g=9.8, d=0.0, h=1e-4, reducers=None, dense=False, **kwargs):
     """Returns the timeseries of a simulated non inertial pendulum
 
     :param yinit: initial conditions (th, w)
@@ -49,13 +51,15 @@ def pendulum(yinit, ts, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, l=1.0,
     :param g: the local acceleration of gravity
     :param d: the damping constant
     :param pivot_x: the horizontal position of the pivot
-    :type pivot_x: function of time or constant
+    :type pivot_x: function of time, constant or Schedule
     :param pivot_y: the vertical position of the pivot
-    :type pivot_y: function of time or constant
+    :type pivot_y: function of time, constant or Schedule
     :param is_acceleration: set to True to input pivot accelerations instead of positions
     :type is_acceleration: boolean
     :param h: numerical step for computing numerical derivatives
-    :param ``**kwargs``: odeint keyword arguments
+    :param reducers: dictionary of reducers (see pendulum.reducers). If given, the timeseries is integrated in chunks and only the reducers' results are returned
+    :param dense: set to True to return a Trajectory, that can be evaluated at any time within ts, instead of the timeseries. Integrated with solve_ivp (LSODA, unless another method is given)
+    :param ``**kwargs``: odeint keyword arguments (or solve_ivp ones, if a method such as 'DOP853' is given)
     :returns: the simulation's timeseries (sol[:, 0] = ths, sol[:, 1] = ws)
 
     """
@@ -68,7 +72,12 @@ def pendulum(yinit, ts, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, l=1.0,
     f = lambda state, t : dpendulum(state, t, pivot_x, pivot_y, is_acceleration, l, g, d, h)
 
     ## Solve it
-    sol = odeint(f, yinit, ts, **kwargs)
+    if reducers is not None:
+        return _reduce(_isolve(f, yinit, ts, _discontinuities(pivot_x, pivot_y), chunk=1000, **kwargs), reducers, (2,))
+    if dense:
+        return _dense(f, yinit, ts, _discontinuities(pivot_x, pivot_y), (2,), **kwargs)
+
+    sol = _solve(f, yinit, ts, _discontinuities(pivot_x, pivot_y), **kwargs)
 
     return sol
 
@@ -102,35 +111,31 @@ def ddouble_pendulum(state, t=0, pivot_x=0.0, pivot_y=0.0, is_acceleration=False
     accel_x, accel_y = _format_accelerations(pivot_x, pivot_y, is_acceleration, h)
 
     ## Define some auxiliary variables
-    M = np.sum(m)
+    M = np.sum(m, axis=0)
     (l1, l2) = l
     (m1, m2) = m
-    det = lambda th1, th2 : m2*(l1*l2)**2*(m1 + m2*np.sin(th1-th2)**2)
-    a = lambda th1, th2 : m2*l2**2 / det(th1, th2)
-    b = lambda th1, th2 : -m2*l1*l2*np.cos(th1 - th2) / det(th1, th2)
-    d = lambda th1, th2 : M*l1**2 / det(th1, th2)
-
-    mat = lambda th1, th2 : np.array(
-                            [[1, 0,           0, 0],
-                             [0, a(th1, th2), 0, b(th1, th2)],
-                             [0, 0,           1, 0],
-                             [0, b(th1, th2), 0, d(th1, th2)]]
-                             )
-
-    F = lambda th1, w1, th2, w2, t: np.array([[w1],
-                                             [-m2*l1*l2*np.sin(th1-th2)*w2**2 - M*g*l1*np.sin(th1) - M*l1*(accel_x(t)*np.cos(th1) + accel_y(t)*np.sin(th1))],
-                                             [w2],
-                                             [m2*l1*l2*np.sin(th1-th2)*w1**2 - m2*g*l2*np.sin(th2) -m2*l2*(accel_x(t)*np.cos(th2) + accel_y(t)*np.sin(th2))]])
+    th1, w1, th2, w2 = state
+    ax, ay = accel_x(t), accel_y(t)
+
+    det = m2*(l1*l2)**2*(m1 + m2*np.sin(th1-th2)**2)
+    a = m2*l2**2 / det
+    b = -m2*l1*l2*np.cos(th1 - th2) / det
+    d = M*l1**2 / det
+
+    F1 = -m2*l1*l2*np.sin(th1-th2)*w2**2 - M*g*l1*np.sin(th1) - M*l1*(ax*np.cos(th1) + ay*np.sin(th1))
+    F2 = m2*l1*l2*np.sin(th1-th2)*w1**2 - m2*g*l2*np.sin(th2) - m2*l2*(ax*np.cos(th2) + ay*np.sin(th2))
 
     ## Dynamical equations
     ## See (drafts/Derivation double_pendulum.pdf)
-    th1, w1, th2, w2 = state
-    dydt = np.dot(mat(th1, th2), F(th1, w1, th2, w2, t))
+    ## Written element-wise, so states of ensembles can be passed as columns
+    dydt = [w1,
+            a*F1 + b*F2,
+            w2,
+            b*F1 + d*F2]
 
-    dydt = dydt.reshape(1,4).tolist()[0]
     return dydt
 
-def double_pendulum(yinit, ts, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, m=(1, 1), l=(1,1), g=9.8, h=1e-4, **kwargs):
+def double_pendulum(yinit, ts, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, m=(1, 1), l=(1,1), g=9.8, h=1e-4, reducers=None, dense=False, **kwargs):
     """Returns the timeseries of a simulated non-inertial double pendulum
 
     :param yinit: initial conditions (th_1, w_1, th_2, w_2)
@@ -139,13 +144,15 @@ def double_pendulum(yinit, ts, pivot_x=0.0, pivot_y=0.0, is_acceleration=False,
     :param l: the length of each pendula
     :param g: the local acceleration of gravity
     :param pivot_x: the horizontal position of the pivot
-    :type pivot_x: function of time or constant
+    :type pivot_x: function of time, constant or Schedule
     :param pivot_y: the vertical position of the pivot
-    :type pivot_y: function of time or constant
+    :type pivot_y: function of time, constant or Schedule
     :param is_acceleration: set to True to input pivot accelerations instead of positions
     :type is_acceleration: boolean
     :param h: numerical step for computing numerical derivatives
-    :param ``**kwargs``: odeint keyword arguments
+    :param reducers: dictionary of reducers (see pendulum.reducers). If given, the timeseries is integrated in chunks and only the reducers' results are returned
+    :param dense: set to True to return a Trajectory, that can be evaluated at any time within ts, instead of the timeseries. Integrated with solve_ivp (LSODA, unless another method is given)
+    :param ``**kwargs``: odeint keyword arguments (or solve_ivp ones, if a method such as 'DOP853' is given)
     :returns: sol: the simulation's timeseries (sol[:, 0] = ths_1, sol[:, 1] = ws_1, sol[:, 2] = ths_2, sol[:, 3] = ws_2)
     """
 
@@ -157,10 +164,306 @@ def double_pendulum(yinit, ts, pivot_x=0.0, pivot_y=0.0, is_acceleration=False,
     f = lambda state, t : ddouble_pendulum(state, t, pivot_x, pivot_y, is_acceleration, m, l, g, h)
 
     ## Solve it
-    sol = odeint(f, yinit, ts, **kwargs)
+    if reducers is not None:
+        return _reduce(_isolve(f, yinit, ts, _discontinuities(pivot_x, pivot_y), chunk=1000, **kwargs), reducers, (4,))
+    if dense:
+        return _dense(f, yinit, ts, _discontinuities(pivot_x, pivot_y), (4,), **kwargs)
+
+    sol = _solve(f, yinit, ts, _discontinuities(pivot_x, pivot_y), **kwargs)
 
     return sol
 
+def pendulum_ensemble(yinits, ts, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, l=1.0, g=9.8, d=0.0, h=1e-4, reducers=None, dense=False, **kwargs):
+    """Returns the timeseries of an ensemble of simulated non inertial pendula
+
+    All the pendula are integrated at once, as a single vectorized system.
+
+    :param yinits: initial conditions, one (th, w) row per pendulum
+    :param ts: integration times
+    :param l: the pendulums' length (constant, or one per pendulum)
+    :param g: the local acceleration of gravity (constant, or one per pendulum)
+    :param d: the damping constant (constant, or one per pendulum)
+    :param pivot_x: the horizontal position of the pivot
+    :type pivot_x: function of time, constant or Schedule (with one column per pendulum)
+    :param pivot_y: the vertical position of the pivot
+    :type pivot_y: function of time, constant or Schedule (with one column per pendulum)
+    :param is_acceleration: set to True to input pivot accelerations instead of positions
+    :type is_acceleration: boolean
+    :param h: numerical step for computing numerical derivatives
+    :param reducers: dictionary of reducers (see pendulum.reducers). If given, the timeseries is integrated in chunks and only the reducers' results are returned
+    :param dense: set to True to return a Trajectory, that can be evaluated at any time within ts, instead of the timeseries. Integrated with solve_ivp (LSODA, unless another method is given)
+    :param ``**kwargs``: odeint keyword arguments (or solve_ivp ones, if a method such as 'DOP853' is given)
+    :returns: the simulation's timeseries (sol[:, i, 0] = ths of the i-th pendulum, sol[:, i, 1] = its ws)
+
+    """
+
+    ## Avoid wrong inputs
+    yinits = np.asarray(yinits, dtype=float)
+    if (yinits.ndim != 2) or (yinits.shape[1] != 2): # One (th_0, w_0) per pendulum
+        raise ValueError('Wrong initial conditions (yinits). Expected a (n, 2) array')
+
+    ## Set the problem
+    n = len(yinits)
+    f = lambda state, t : np.ravel(np.transpose(dpendulum(state.reshape(n, 2).T, t, pivot_x, pivot_y, is_acceleration, l, g, d, h)))
+
+    ## Solve it
+    if reducers is not None:
+        return _reduce(_isolve(f, yinits.ravel(), ts, _discontinuities(pivot_x, pivot_y), chunk=1000, **kwargs), reducers, (n, 2))
+    if dense:
+        return _dense(f, yinits.ravel(), ts, _discontinuities(pivot_x, pivot_y), (n, 2), **kwargs)
+
+    sol = _solve(f, yinits.ravel(), ts, _discontinuities(pivot_x, pivot_y), **kwargs)
+
+    return sol.reshape(-1, n, 2)
+
+def double_pendulum_ensemble(yinits, ts, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, m=(1, 1), l=(1,1), g=9.8, h=1e-4, reducers=None, dense=False, **kwargs):
+    """Returns the timeseries of an ensemble of simulated non-inertial double pendula
+
+    All the pendula are integrated at once, as a single vectorized system.
+
+    :param yinits: initial conditions, one (th_1, w_1, th_2, w_2) row per pendulum
+    :param ts: integration times
+    :param m: the mass of each pendula, as (m_1, m_2). Each of them can be a constant, or one value per pendulum
+    :param l: the length of each pendula, as (l_1, l_2). Each of them can be a constant, or one value per pendulum
+    :param g: the local acceleration of gravity (constant, or one per pendulum)
+    :param pivot_x: the horizontal position of the pivot
+    :type pivot_x: function of time, constant or Schedule (with one column per pendulum)
+    :param pivot_y: the vertical position of the pivot
+    :type pivot_y: function of time, constant or Schedule (with one column per pendulum)
+    :param is_acceleration: set to True to input pivot accelerations instead of positions
+    :type is_acceleration: boolean
+    :param h: numerical step for computing numerical derivatives
+    :param reducers: dictionary of reducers (see pendulum.reducers). If given, the timeseries is integrated in chunks and only the reducers' results are returned
+    :param dense: set to True to return a Trajectory, that can be evaluated at any time within ts, instead of the timeseries. Integrated with solve_ivp (LSODA, unless another method is given)
+    :param ``**kwargs``: odeint keyword arguments (or solve_ivp ones, if a method such as 'DOP853' is given)
+    :returns: the simulation's timeseries (sol[:, i, :] is the timeseries of the i-th pendulum, as in double_pendulum)
+
+    """
+
+    ## Avoid wrong inputs
+    yinits = np.asarray(yinits, dtype=float)
+    if (yinits.ndim != 2) or (yinits.shape[1] != 4): # One (th_1, w_1, th_2, w_2) per pendulum
+        raise ValueError('Wrong initial conditions (yinits). Expected a (n, 4) array')
+
+    if (len(m) != 2) or (len(l) != 2): # The checks on the values are left to ddouble_pendulum
+        raise ValueError('Wrong pendulum masses (m) or lengths (l). Expected 2 values or vectors')
+
+    m = np.stack(np.broadcast_arrays(*m)) # Shape (2,) or (2, n)
+    l = np.stack(np.broadcast_arrays(*l))
+
+    ## Set the problem
+    n = len(yinits)
+    f = lambda state, t : np.ravel(np.transpose(ddouble_pendulum(state.reshape(n, 4).T, t, pivot_x, pivot_y, is_acceleration, m, l, g, h)))
+
+    ## Solve it
+    if reducers is not None:
+        return _reduce(_isolve(f, yinits.ravel(), ts, _discontinuities(pivot_x, pivot_y), chunk=1000, **kwargs), reducers, (n, 4))
+    if dense:
+        return _dense(f, yinits.ravel(), ts, _discontinuities(pivot_x, pivot_y), (n, 4), **kwargs)
+
+    sol = _solve(f, yinits.ravel(), ts, _discontinuities(pivot_x, pivot_y), **kwargs)
+
+    return sol.reshape(-1, n, 4)
+
+def pendulum_energy(state, l=1.0, g=9.8):
+    """Returns the mechanical energy (per unit mass) of a pendulum, relative to its pivot
+
+    :param state: the state (angle, angular speed). Timeseries and ensembles are accepted, as long as the state is along the last axis
+    :param l: the pendulum's length
+    :param g: the local acceleration of gravity
+    :returns: the energy
+
+    """
+
+    state = np.asarray(state, dtype=float)
+    th, w = state[..., 0], state[..., 1]
+
+    T = 0.5*(l*w)**2 # Kinetic
+    V = g*l*(1 - np.cos(th)) # Potential
+
+    return T + V
+
+def double_pendulum_energy(state, m=(1, 1), l=(1, 1), g=9.8):
+    """Returns the mechanical energy of a double pendulum, relative to its pivot
+
+    :param state: the state (angle_1, angular speed_1, angle_2, angular_speed_2). Timeseries and ensembles are accepted, as long as the state is along the last axis
+    :param m: the mass of each pendula
+    :param l: the length of each pendula
+    :param g: the local acceleration of gravity
+    :returns: the energy
+
+    """
+
+    state = np.asarray(state, dtype=float)
+    th1, w1, th2, w2 = state[..., 0], state[..., 1], state[..., 2], state[..., 3]
+    (m1, m2) = m
+    (l1, l2) = l
+
+    T = 0.5*(m1 + m2)*(l1*w1)**2 + 0.5*m2*(l2*w2)**2 + m2*l1*l2*w1*w2*np.cos(th1 - th2) # Kinetic
+    V = (m1 + m2)*g*l1*(1 - np.cos(th1)) + m2*g*l2*(1 - np.cos(th2)) # Potential
+
+    return T + V
+
+def _solve(f, yinit, ts, breaks=(), **kwargs):
+    """ Integrates a dynamical equation, restarting the integrator at discontinuities
+
+    Between discontinuities, the problem is solved with a single call to odeint.
+
+    :param f: the dynamical equation, as a function of (state, t)
+    :param yinit: initial condition
+    :param ts: integration times
+    :param breaks: times where the dynamical equation is discontinuous
+    :param ``**kwargs``: odeint (or solve_ivp) keyword arguments
+    :returns: the timeseries
+    """
+
+    ts = np.asarray(ts, dtype=float)
+    breaks = np.asarray(breaks, dtype=float)
+    if not np.any((breaks > ts[0]) & (breaks < ts[-1])): # Nothing to worry about
+        return _integrate(f, yinit, ts, **kwargs)
+
+    return np.concatenate([piece for _, piece in _isolve(f, yinit, ts, breaks, **kwargs)])
+
+def _isolve(f, yinit, ts, breaks=(), chunk=None, **kwargs):
+    """ Integrates a dynamical equation piece by piece
+
+    The integrator is restarted at each discontinuity and, optionally, every
+    few integration times, so the timeseries never has to be kept in memory
+    as a whole.
+
+    :param f: the dynamical equation, as a function of (state, t)
+    :param yinit: initial condition
+    :param ts: integration times
+    :param breaks: times where the dynamical equation is discontinuous
+    :param chunk: maximum number of integration times per piece. If None, pieces only end at discontinuities
+    :param ``**kwargs``: odeint (or solve_ivp) keyword arguments
+    :returns: a generator of (ts_piece, sol_piece), covering all the integration times in order
+    """
+
+    ts = np.asarray(ts, dtype=float)
+    if np.any(np.diff(ts) <= 0): # The pieces are built assuming forward integration
+        raise ValueError('Wrong integration times (ts). Expected increasing times')
+
+    breaks = np.asarray(breaks, dtype=float)
+    breaks = breaks[(breaks > ts[0]) & (breaks < ts[-1])]
+    if chunk is not None:
+        breaks = np.concatenate((breaks, ts[chunk:-1:chunk]))
+
+    tcrit = np.asarray(kwargs.pop('tcrit', ()), dtype=float)
+    edges = np.unique(np.concatenate(([ts[0]], breaks, [ts[-1]])))
+
+    if (len(ts) == 1): # Nothing to integrate
+        yield ts, np.array([yinit], dtype=float)
+
+    y = yinit
+    for a, b in zip(edges[:-1], edges[1:]):
+        ## Integrate the segment [a, b)
+        inside = (ts > a) & (ts <= b)
+        if (a == ts[0]):
+            inside[0] = True
+        seg_ts = np.unique(np.concatenate(([a], ts[inside], [b])))
+
+        upper = np.nextafter(b, a) # The next segment starts exactly at b
+        g = lambda state, t : f(state, min(t, upper))
+
+        seg_tcrit = np.append(tcrit[(tcrit > a) & (tcrit < b)], b) # Don't step beyond b
+        seg_sol = _integrate(g, y, seg_ts, tcrit=seg_tcrit, **kwargs)
+        y = seg_sol[-1]
+
+        if np.any(inside):
+            yield ts[inside], seg_sol[np.searchsorted(seg_ts, ts[inside])]
+
+def _integrate(f, yinit, ts, **kwargs):
+    """ Integrates a dynamical equation with odeint or, if a method is given, with solve_ivp
+
+    :param f: the dynamical equation, as a function of (state, t)
+    :param yinit: initial condition
+    :param ts: integration times
+    :param ``**kwargs``: odeint keyword arguments, or solve_ivp ones (including method)
+    :returns: the timeseries, as returned by odeint
+    """
+
+    if 'method' not in kwargs:
+        return odeint(f, yinit, ts, **kwargs)
+
+    kwargs.pop('tcrit', None) # solve_ivp never steps beyond the last time
+    ts = np.asarray(ts, dtype=float)
+    if (len(ts) < 2): # Nothing to integrate
+        return np.array([yinit], dtype=float)
+
+    res = solve_ivp(lambda t, state : f(state, t), (ts[0], ts[-1]), yinit, t_eval=ts, **kwargs)
+    if not res.success:
+        raise RuntimeError('Integration failed: {}'.format(res.message))
+
+    return res.y.T
+
+def _dense(f, yinit, ts, breaks, shape, **kwargs):
+    """ Integrates a dynamical equation, keeping the steps accepted by the integrator
+
+    As in _solve, the integrator is restarted at each discontinuity.
+
+    :param f: the dynamical equation, as a function of (state, t)
+    :param yinit: initial condition
+    :param ts: integration times. Only the first and the last one are used
+    :param breaks: times where the dynamical equation is discontinuous
+    :param shape: shape of the state at each time
+    :param ``**kwargs``: solve_ivp keyword arguments
+    :returns: the trajectory
+    """
+
+    ts = np.asarray(ts, dtype=float)
+    breaks = np.asarray(breaks, dtype=float)
+    breaks = breaks[(breaks > ts[0]) & (breaks < ts[-1])]
+    edges = np.unique(np.concatenate(([ts[0]], breaks, [ts[-1]])))
+    kwargs.setdefault('method', 'LSODA')
+
+    knots, ys, dydts = [], [], []
+    y = yinit
+    for a, b in zip(edges[:-1], edges[1:]):
+        upper = np.nextafter(b, a) # The next segment starts exactly at b
+        g = lambda state, t : f(state, min(t, upper))
+
+        res = solve_ivp(lambda t, state : g(state, t), (a, b), y, **kwargs)
+        if not res.success:
+            raise RuntimeError('Integration failed: {}'.format(res.message))
+
+        knots.append(res.t)
+        ys.append(res.y.T)
+        dydts.append([g(state, t) for t, state in zip(res.t, res.y.T)])
+        y = res.y[:, -1]
+
+    return Trajectory(np.concatenate(knots), np.concatenate(ys), np.concatenate(dydts), shape)
+
+def _reduce(pieces, reducers, shape):
+    """ Feeds the pieces of a timeseries to a set of reducers
+
+    :param pieces: a generator of (ts_piece, sol_piece), as returned by _isolve
+    :param reducers: dictionary of reducers
+    :param shape: shape of the state at each time
+    :returns: a dictionary with the result of each reducer
+    """
+
+    for reducer in reducers.values(): # Reducers may be reused across simulations
+        reducer.reset()
+
+    for ts, sol in pieces:
+        sol = sol.reshape((len(ts),) + shape)
+        for reducer in reducers.values():
+            reducer.update(ts, sol)
+
+    return {name: reducer.result() for name, reducer in reducers.items()}
+
+def _discontinuities(*pivots):
+    """ Returns the times where the pivot's accelerations jump
+
+    :param pivots: the pivot's movements
+    :returns: the discontinuities of the schedules among them
+    """
+
+    breaks = [pivot.discontinuities() for pivot in pivots if isinstance(pivot, Schedule)]
+
+    return np.concatenate(breaks) if breaks else np.empty(0)
+
 def _format_accelerations(pivot_x, pivot_y, is_acceleration, h):
     """ Returns the pivot movement as acceleration
 
@@ -179,6 +482,10 @@ def _format_accelerations(pivot_x, pivot_y, is_acceleration, h):
     """
 
     ## Input interpretation
+    if (isinstance(pivot_x, Schedule) or isinstance(pivot_y, Schedule)) and not is_acceleration:
+        # Sampled schedules can't be differentiated twice
+        raise ValueError('Wrong pivot movement. Schedules are only accepted as accelerations (is_acceleration=True)')
+
     if callable(pivot_x): # If the user inputs a function
         pass # Do nothing
     elif isinstance(pivot_x, float) or isinstance(pivot_x, int):
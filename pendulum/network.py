@@ -0,0 +1,134 @@
+import numpy as np
+from scipy import sparse
+from scipy.integrate import solve_ivp
+from pendulum.models import _format_accelerations
+
+def dnetwork(state, t=0, coupling=None, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, l=1.0, g=9.8, d=0.0, h=1e-4):
+    """Returns the dynamical equation of a network of coupled non inertial pendula
+
+    All the pendula hang from a common, moving support. Pendula i and j are
+    coupled by a spring of stiffness coupling[i, j], that contributes
+    coupling[i, j] * (th_j - th_i) to the angular acceleration of i.
+
+    :param state: the state (th_1, ..., th_n, w_1, ..., w_n)
+    :param t: the time
+    :param coupling: the (n, n) sparse coupling matrix. If None, the pendula are uncoupled
+    :param l: the pendula's length (constant, or one per pendulum)
+    :param g: the local acceleration of gravity
+    :param d: the damping constant (constant, or one per pendulum)
+    :param pivot_x: the horizontal position of the support
+    :type pivot_x: function of time or constant
+    :param pivot_y: the vertical position of the support
+    :type pivot_y: function of time or constant
+    :param is_acceleration: set to True to input pivot accelerations instead of positions
+    :type is_acceleration: boolean
+    :param h: numerical step for computing numerical derivatives
+    :returns: the time derivative (dydt)
+
+    """
+
+    n = len(state) // 2
+    lap = _laplacian(coupling, n)
+    accel_x, accel_y = _format_accelerations(pivot_x, pivot_y, is_acceleration, h)
+
+    return _dnetwork(state, t, lap, accel_x, accel_y, l, g, d)
+
+def network(yinit, ts, coupling=None, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, l=1.0, g=9.8, d=0.0, h=1e-4, **kwargs):
+    """Returns the timeseries of a simulated network of coupled non inertial pendula
+
+    The dynamical equation is evaluated with sparse matrix-vector products,
+    and the stiff solvers (BDF, Radau) receive a sparse jacobian, so the cost
+    per step scales with the number of couplings.
+
+    :param yinit: initial conditions (th_1, ..., th_n, w_1, ..., w_n)
+    :param ts: integration times
+    :param coupling: the (n, n) sparse coupling matrix (see dnetwork). If None, the pendula are uncoupled
+    :param l: the pendula's length (constant, or one per pendulum)
+    :param g: the local acceleration of gravity
+    :param d: the damping constant (constant, or one per pendulum)
+    :param pivot_x: the horizontal position of the support
+    :type pivot_x: function of time or constant
+    :param pivot_y: the vertical position of the support
+    :type pivot_y: function of time or constant
+    :param is_acceleration: set to True to input pivot accelerations instead of positions
+    :type is_acceleration: boolean
+    :param h: numerical step for computing numerical derivatives
+    :param ``**kwargs``: solve_ivp keyword arguments (the default method is BDF)
+    :returns: the simulation's timeseries (sol[:, :n] = ths, sol[:, n:] = ws)
+
+    """
+
+    ## Avoid wrong inputs
+    if (len(yinit) % 2 != 0): # The initial conditions are (ths, ws)
+        raise ValueError('Wrong initial condition (yinit). Expected a vector with an even number of elements')
+
+    if np.any(np.less_equal(l, 0.0)): # Negative or zero lengths don't make sense
+        raise ValueError('Wrong pendulum length (l). Expected positive float')
+
+    if np.any(np.less(d, 0.0)): # A negative damping constant doesn't make sense
+        raise ValueError('Wrong damping constant (d). Expected zero or positive float')
+
+    ## Set the problem
+    n = len(yinit) // 2
+    ts = np.asarray(ts, dtype=float)
+    lap = _laplacian(coupling, n)
+    accel_x, accel_y = _format_accelerations(pivot_x, pivot_y, is_acceleration, h)
+
+    f = lambda t, state : _dnetwork(state, t, lap, accel_x, accel_y, l, g, d)
+
+    kwargs.setdefault('method', 'BDF')
+    if kwargs['method'] in ('BDF', 'Radau'):
+        kwargs.setdefault('jac', lambda t, state : _jacobian(state, t, lap, accel_x, accel_y, l, g, d))
+
+    ## Solve it
+    res = solve_ivp(f, (ts[0], ts[-1]), np.asarray(yinit, dtype=float), t_eval=ts, **kwargs)
+    if not res.success:
+        raise RuntimeError('Integration failed: {}'.format(res.message))
+
+    return res.y.T
+
+def _laplacian(coupling, n):
+    """ Returns the laplacian of the coupling matrix
+
+    The coupling term of the dynamical equation is -laplacian @ ths.
+
+    :param coupling: the (n, n) sparse coupling matrix, or None
+    :param n: number of pendula
+    :returns: the laplacian, as a sparse csr matrix
+    """
+
+    if coupling is None:
+        return sparse.csr_matrix((n, n))
+
+    coupling = sparse.csr_matrix(coupling)
+    if coupling.shape != (n, n):
+        raise ValueError('Wrong coupling matrix. Expected a ({}, {}) matrix'.format(n, n))
+
+    degree = np.asarray(coupling.sum(axis=1)).ravel()
+
+    return (sparse.diags(degree) - coupling).tocsr()
+
+def _dnetwork(state, t, lap, accel_x, accel_y, l, g, d):
+    """ Returns the dynamical equation of the network, with the auxiliary objects already built
+    """
+
+    n = len(state) // 2
+    th, w = state[:n], state[n:]
+    ax, ay = accel_x(t), accel_y(t)
+
+    dw = -g/l * np.sin(th) - d * w - ax * np.cos(th) / l - ay * np.sin(th) / l - lap @ th
+
+    return np.concatenate((w, dw))
+
+def _jacobian(state, t, lap, accel_x, accel_y, l, g, d):
+    """ Returns the sparse jacobian of the network's dynamical equation
+    """
+
+    n = len(state) // 2
+    th = state[:n]
+    ax, ay = accel_x(t), accel_y(t)
+
+    dw_dth = sparse.diags(-g/l * np.cos(th) + ax * np.sin(th) / l - ay * np.cos(th) / l) - lap
+    dw_dw = sparse.diags(np.broadcast_to(-d, (n,)).astype(float))
+
+    return sparse.bmat([[None, sparse.identity(n)], [dw_dth, dw_dw]], format='csc')
@@ -0,0 +1,145 @@
+import itertools
+import os
+import numpy as np
+
+def convert(csv_path, out_path, columns=('t', 'x', 'y'), chunksize=100000):
+    """Converts a csv log of the pivot's movement into a memory-mappable binary file
+
+    The csv file is streamed in chunks, so it never has to fit in memory.
+    Rows with missing values are dropped, and the remaining ones are sorted
+    by time (keeping only the first row of repeated times).
+    The result is stored as a .npy file with one row per column: the first
+    row contains the (sorted) times, and can be used as an index.
+
+    :param csv_path: the csv file. Its first line must contain the column names
+    :param out_path: the binary file to create (.npy)
+    :param columns: names of the time column followed by the position columns
+    :param chunksize: number of lines read at a time
+    :returns: the number of valid rows
+    """
+
+    ## Avoid wrong inputs
+    if (len(columns) < 2): # At least time and one position are needed
+        raise ValueError('Wrong columns. Expected the time column followed by at least one position column')
+
+    if (chunksize <= 0): # The chunk size has to be positive
+        raise ValueError('Wrong chunk size (chunksize). Expected a positive integer')
+
+    tmp_path = out_path + '.tmp'
+    n = 0
+    is_sorted = True # Strictly increasing times, so far
+    last_t = -np.inf
+
+    ## First pass: stream, clean, and dump to a raw file
+    with open(csv_path, encoding='utf-8-sig') as f:
+        header = [name.strip() for name in f.readline().split(',')]
+        missing = [name for name in columns if name not in header]
+        if missing:
+            raise ValueError('Wrong columns. {} not found in {}'.format(missing, csv_path))
+        usecols = [header.index(name) for name in columns]
+
+        with open(tmp_path, 'wb') as tmp:
+            while True:
+                lines = list(itertools.islice(f, chunksize))
+                if not lines:
+                    break
+
+                chunk = np.genfromtxt(lines, delimiter=',', usecols=usecols, ndmin=2)
+                chunk = chunk[~np.isnan(chunk).any(axis=1)] # Remove artifacts
+                if not len(chunk):
+                    continue
+
+                ts = chunk[:, 0]
+                is_sorted = is_sorted and (ts[0] > last_t) and np.all(np.diff(ts) > 0)
+                last_t = ts[-1]
+
+                tmp.write(np.ascontiguousarray(chunk, dtype=np.float64).tobytes())
+                n += len(chunk)
+
+    ## Second pass: sort by time, column by column
+    try:
+        raw = np.memmap(tmp_path, dtype=np.float64, mode='r', shape=(n, len(columns))) if n else np.empty((0, len(columns)))
+        if is_sorted:
+            order = slice(None)
+        else:
+            order = np.argsort(raw[:, 0], kind='stable')
+            ts = raw[order, 0]
+            order = order[np.concatenate(([True], np.diff(ts) > 0))] # Drop repeated times
+
+        ts = raw[order, 0]
+        out = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float64, shape=(len(columns), len(ts)))
+        out[0] = ts
+        for j in range(1, len(columns)):
+            out[j] = raw[order, j]
+        out.flush()
+        n = len(ts)
+        del raw, out
+    finally:
+        os.remove(tmp_path)
+
+    return n
+
+class PivotLog():
+    """Memory-mapped log of the pivot's movement
+
+    Only the pages covering the requested time window are ever read from disk.
+
+    :param path: a binary file created with convert
+    """
+
+    def __init__(self, path):
+        self.data = np.load(path, mmap_mode='r')
+        self.ts = self.data[0]
+
+    def __len__(self):
+        return len(self.ts)
+
+    def window(self, t0=None, t1=None, margin=3):
+        """Returns the samples covering a time window
+
+        :param t0: start of the window. If None, the log's start
+        :param t1: end of the window. If None, the log's end
+        :param margin: number of extra samples at each side
+        :returns: an in-memory array, with the times in the first row and the positions in the rest
+        """
+
+        i0 = 0 if t0 is None else np.searchsorted(self.ts, t0, side='right') - 1 - margin
+        i1 = len(self) if t1 is None else np.searchsorted(self.ts, t1, side='left') + 1 + margin
+        i0, i1 = max(i0, 0), min(i1, len(self))
+
+        return np.array(self.data[:, i0:i1])
+
+    def pivot(self, t0=None, t1=None, kind='cubic'):
+        """Returns the pivot's positions as interpolated functions of time
+
+        The output can be passed directly as the pivot_x and pivot_y arguments
+        of pendulum and double_pendulum.
+
+        :param t0: start of the simulation. If None, the log's start
+        :param t1: end of the simulation. If None, the log's end
+        :param kind: interpolation method ('linear' or 'cubic')
+        :returns: a function of time for each position column (e.g.: pivot_x, pivot_y)
+        """
+
+        data = self.window(t0, t1)
+        if (data.shape[1] < 2): # Nothing to interpolate
+            raise ValueError('Wrong time window. Less than 2 samples available')
+
+        return tuple(_interpolator(data[0], values, kind) for values in data[1:])
+
+def _interpolator(ts, values, kind):
+    """ Returns an interpolated function of time
+
+    :param ts: sorted times
+    :param values: the values at those times
+    :param kind: interpolation method ('linear' or 'cubic')
+    :returns: the interpolated function
+    """
+
+    if kind == 'linear':
+        return lambda t : np.interp(t, ts, values)
+    elif kind == 'cubic':
+        from scipy.interpolate import CubicSpline
+        return CubicSpline(ts, values)
+    else:
+        raise ValueError('Wrong interpolation method (kind). Use linear or cubic')
@@ -0,0 +1,144 @@
+import numpy as np
+from pendulum.models import pendulum_energy, double_pendulum_energy
+
+## Reducers summarize a timeseries while it is being integrated.
+## They receive the timeseries in chunks, with time along the first axis and
+## the state along the last one (any axes in between, such as the members of
+## an ensemble, are kept in the results).
+
+class Reducer():
+    """Base class of the online reducers
+
+    Subclasses implement update, called once per chunk of the timeseries,
+    and result. Stateful subclasses also implement reset, called by the
+    solvers before each simulation, so a reducer can be reused.
+    """
+
+    def reset(self):
+        """Forgets the accumulated chunks
+        """
+        pass
+
+    def update(self, ts, states):
+        """Accumulates a chunk of the timeseries
+
+        :param ts: the times of the chunk
+        :param states: the states at those times
+        """
+        raise NotImplementedError
+
+    def result(self):
+        """Returns the accumulated statistic
+        """
+        raise NotImplementedError
+
+class MaxAbs(Reducer):
+    """Maximum absolute value of a state variable
+
+    :param index: the state variable (e.g.: 0 for the angle, 1 for the angular speed)
+    """
+
+    def __init__(self, index=0):
+        self.index = index
+        self.reset()
+
+    def reset(self):
+        self.value = None
+
+    def update(self, ts, states):
+        value = np.max(np.abs(states[..., self.index]), axis=0)
+        self.value = value if self.value is None else np.maximum(self.value, value)
+
+    def result(self):
+        return self.value
+
+class RMS(Reducer):
+    """Root mean square of a state variable, over the integration times
+
+    :param index: the state variable (e.g.: 0 for the angle, 1 for the angular speed)
+    """
+
+    def __init__(self, index=1):
+        self.index = index
+        self.reset()
+
+    def reset(self):
+        self.total = 0.0
+        self.n = 0
+
+    def update(self, ts, states):
+        self.total = self.total + np.sum(states[..., self.index]**2, axis=0)
+        self.n += len(ts)
+
+    def result(self):
+        return np.sqrt(self.total / self.n)
+
+class Energy(Reducer):
+    """Minimum, maximum and drift (final minus initial) of the mechanical energy
+
+    The model (simple or double pendulum) is deduced from the size of the state.
+
+    :param l: the pendulum's length (or lengths). If None, the models' default
+    :param g: the local acceleration of gravity
+    :param m: the mass of each pendula (double pendulum only)
+    """
+
+    def __init__(self, l=None, g=9.8, m=(1, 1)):
+        self.l = l
+        self.g = g
+        self.m = m
+        self.reset()
+
+    def reset(self):
+        self.min, self.max, self.first, self.last = None, None, None, None
+
+    def update(self, ts, states):
+        if states.shape[-1] == 2:
+            es = pendulum_energy(states, 1.0 if self.l is None else self.l, self.g)
+        else:
+            es = double_pendulum_energy(states, self.m, (1, 1) if self.l is None else self.l, self.g)
+
+        if self.first is None:
+            self.first, self.min, self.max = es[0], es.min(axis=0), es.max(axis=0)
+        else:
+            self.min, self.max = np.minimum(self.min, es.min(axis=0)), np.maximum(self.max, es.max(axis=0))
+        self.last = es[-1]
+
+    def result(self):
+        return {'min': self.min, 'max': self.max, 'drift': self.last - self.first}
+
+class SettlingTime(Reducer):
+    """Time since which a set of state variables stays close to a target
+
+    The result is NaN if the variables are not settled at the end of the integration.
+
+    :param tol: maximum distance to the target
+    :param target: the target values (default: the stable equilibrium)
+    :param index: the state variables. If None, all of them
+    """
+
+    def __init__(self, tol=1e-3, target=0.0, index=None):
+        self.tol = tol
+        self.target = target
+        self.index = index
+        self.reset()
+
+    def reset(self):
+        self.since = None
+
+    def update(self, ts, states):
+        if self.index is not None:
+            states = states[..., np.atleast_1d(self.index)]
+        inside = np.all(np.abs(states - self.target) <= self.tol, axis=-1)
+
+        ## Index of the first time of the last run of settled times, within the chunk
+        last_outside = np.where(~inside, np.arange(len(ts)).reshape((-1,) + (1,)*(inside.ndim - 1)), -1).max(axis=0)
+        since = np.where(last_outside < len(ts) - 1, ts[np.minimum(last_outside + 1, len(ts) - 1)], np.nan)
+
+        if self.since is None:
+            self.since = since
+        else: # A chunk that is settled from its beginning continues the previous run, if any
+            self.since = np.where((last_outside == -1) & ~np.isnan(self.since), self.since, since)
+
+    def result(self):
+        return self.since
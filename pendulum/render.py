@@ -0,0 +1,208 @@
+import multiprocessing
+import shutil
+import subprocess
+import numpy as np
+
+def cartesian(sol, ts, pivot_x=0.0, pivot_y=0.0, l=1.0):
+    """Returns the cartesian coordinates of every joint of a simulated pendulum
+
+    All the frames are computed in a single vectorized pass.
+
+    :param sol: the simulation's timeseries, as returned by pendulum or double_pendulum
+    :param ts: integration times
+    :param pivot_x: the horizontal position of the pivot
+    :type pivot_x: function of time or constant
+    :param pivot_y: the vertical position of the pivot
+    :type pivot_y: function of time or constant
+    :param l: the pendulum's length (or lengths, for the double pendulum)
+    :returns: coords, with shape (len(ts), joints, 2). coords[:, 0, :] is the pivot, coords[:, 1, :] the first bob, and so on
+    """
+
+    ## Avoid wrong inputs
+    sol = np.asarray(sol, dtype=float)
+    ts = np.asarray(ts, dtype=float)
+    if (sol.ndim != 2) or (sol.shape[1] not in (2, 4)): # Only simple and double pendula are supported
+        raise ValueError('Wrong timeseries (sol). Expected a (len(ts), 2) or (len(ts), 4) array')
+
+    ls = np.atleast_1d(np.asarray(l, dtype=float))
+    ths = sol[:, 0::2] # One angle per link
+    if (len(ls) != ths.shape[1]):
+        raise ValueError('Wrong pendulum length (l). Expected one length per link')
+
+    ## Pivot's positions
+    coords = np.empty((len(ts), ths.shape[1] + 1, 2))
+    coords[:, 0, 0] = _format_positions(pivot_x, ts)
+    coords[:, 0, 1] = _format_positions(pivot_y, ts)
+
+    ## Bob's positions (each link hangs from the previous joint)
+    coords[:, 1:, 0] = coords[:, :1, 0] + np.cumsum(ls * np.sin(ths), axis=1)
+    coords[:, 1:, 1] = coords[:, :1, 1] - np.cumsum(ls * np.cos(ths), axis=1)
+
+    return coords
+
+def decimate(ts, fps=None):
+    """Returns the indices of the frames to be rendered at a given frame rate
+
+    One second of simulated time is mapped to one second of video. If the
+    time steps are longer than a frame, their indices are repeated.
+
+    :param ts: integration times
+    :param fps: target frames per second. If None, every time step is kept
+    :returns: the indices of the selected time steps (non decreasing, one per frame)
+    """
+
+    ts = np.asarray(ts, dtype=float)
+    if fps is None:
+        return np.arange(len(ts))
+
+    if (fps <= 0.0): # A non-positive frame rate doesn't make sense
+        raise ValueError('Wrong frame rate (fps). Expected a positive float')
+
+    ## Pick the time step closest to each frame's time
+    frame_ts = np.arange(ts[0], ts[-1], 1.0/fps)
+    idx = np.clip(np.searchsorted(ts, frame_ts), 1, len(ts) - 1)
+    closest_left = (frame_ts - ts[idx - 1]) < (ts[idx] - frame_ts)
+    idx = idx - closest_left
+
+    return idx
+
+def render(sol, ts, output, pivot_x=0.0, pivot_y=0.0, l=1.0, fps=30, xlim=(-3, 3), ylim=(-3, 3), size=(4, 4), dpi=100, processes=None, chunksize=32):
+    """Renders a simulated pendulum as a sequence of frames
+
+    Frames are rendered headlessly across a pool of processes and streamed,
+    in order, to the output. Repeated frames (see decimate) are rendered once.
+
+    :param sol: the simulation's timeseries, as returned by pendulum or double_pendulum
+    :param ts: integration times
+    :param output: where to send the frames. Either a file name pattern for an image sequence (e.g.: 'frames/im_%05d.png'), a video or gif file name (requires ffmpeg), or a function of one rgb frame
+    :param pivot_x: the horizontal position of the pivot
+    :type pivot_x: function of time or constant
+    :param pivot_y: the vertical position of the pivot
+    :type pivot_y: function of time or constant
+    :param l: the pendulum's length (or lengths, for the double pendulum)
+    :param fps: target frames per second. If None, every time step is rendered
+    :param xlim: horizontal limits of the plot
+    :param ylim: vertical limits of the plot
+    :param size: figure size, in inches
+    :param dpi: resolution, in dots per inch
+    :param processes: number of rendering processes. Defaults to the number of cores
+    :param chunksize: number of frames sent to each process at a time
+    :returns: the number of rendered frames
+    """
+
+    ## Precompute everything that will be drawn
+    ts = np.asarray(ts, dtype=float)
+    idx = decimate(ts, fps)
+    unique, repeats = np.unique(idx, return_counts=True)
+    coords = cartesian(sol, ts, pivot_x, pivot_y, l)[unique]
+    frame_ts = ts[unique]
+
+    style = {'xlim': xlim, 'ylim': ylim, 'size': size, 'dpi': dpi}
+    tasks = [(coords[i:i+chunksize], frame_ts[i:i+chunksize], style) for i in range(0, len(unique), chunksize)]
+
+    ## Render and stream
+    width, height = int(size[0]*dpi), int(size[1]*dpi)
+    write, close = _format_output(output, width, height, fps)
+    counts = iter(repeats)
+    try:
+        if processes == 1: # Avoid the pool overhead
+            for frames in map(_render_chunk, tasks):
+                for frame in frames:
+                    for _ in range(next(counts)):
+                        write(frame)
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                for frames in pool.imap(_render_chunk, tasks):
+                    for frame in frames:
+                        for _ in range(next(counts)):
+                            write(frame)
+    finally:
+        close()
+
+    return len(idx)
+
+def _render_chunk(task):
+    """ Renders a chunk of frames
+
+    The figure and its artists are created once per chunk, and only
+    updated for each frame.
+
+    :param task: the coordinates, times and style of the frames
+    :returns: a list of rgb frames
+    """
+
+    ## Headless backend, independent of pyplot
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    coords, frame_ts, style = task
+
+    fig = Figure(figsize=style['size'], dpi=style['dpi'])
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, aspect='equal', xlim=style['xlim'], ylim=style['ylim'])
+    ax.grid()
+
+    line, = ax.plot([], [], 'o-', lw=1)
+    time_template = 'time = %.1fs'
+    time_text = ax.text(0.05, 0.9, '', transform=ax.transAxes)
+
+    frames = []
+    for xy, t in zip(coords, frame_ts):
+        line.set_data(xy[:, 0], xy[:, 1])
+        time_text.set_text(time_template % t)
+        canvas.draw()
+        frames.append(np.asarray(canvas.buffer_rgba())[:, :, :3].copy())
+
+    return frames
+
+def _format_output(output, width, height, fps):
+    """ Returns the functions writing frames to, and closing, the output
+
+    :param output: a file name pattern, a video file name, or a function of one rgb frame
+    :param width: frame width, in pixels
+    :param height: frame height, in pixels
+    :param fps: frames per second
+    :returns: write and close functions
+    """
+
+    if callable(output): # If the user inputs a function
+        write = output
+        close = lambda : None
+    elif isinstance(output, str) and ('%' in output): # Image sequence
+        from matplotlib.image import imsave
+
+        counter = iter(range(2**31))
+        write = lambda frame : imsave(output % next(counter), frame)
+        close = lambda : None
+    elif isinstance(output, str): # Video, encoded by ffmpeg
+        if shutil.which('ffmpeg') is None:
+            raise RuntimeError('ffmpeg is required to encode {}. Use an image sequence pattern instead'.format(output))
+
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', '{}x{}'.format(width, height),
+               '-r', str(fps or 30), '-i', '-', output]
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        write = lambda frame : proc.stdin.write(frame.tobytes())
+        def close():
+            proc.stdin.close()
+            proc.wait()
+    else:
+        raise ValueError('Wrong output. Use a file name or a function of one frame')
+
+    return write, close
+
+def _format_positions(pivot, ts):
+    """ Returns the pivot's positions at the given times
+
+    :param pivot: the position of the pivot
+    :type pivot: function of time or constant
+    :param ts: times
+    :returns: the positions, as an array shaped like ts
+    """
+
+    if callable(pivot): # If the user inputs a function
+        return np.broadcast_to(np.asarray(pivot(ts), dtype=float), ts.shape)
+    elif isinstance(pivot, float) or isinstance(pivot, int):
+        return np.full(ts.shape, float(pivot))
+    else:
+        raise ValueError('Wrong pivot position. Use x = constant or x(t) = function of t')
@@ -0,0 +1,144 @@
+import hashlib
+import pickle
+import numpy as np
+from pendulum.schedules import Schedule
+
+## A resimulator integrates every problem in the same chunks of integration
+## times (as checkpointed simulations do), and keeps the result of each chunk
+## as a snapshot. Snapshots are keyed by everything that determines them: the
+## solver, its arguments, the integration times so far and the pivot's input
+## so far. A new simulation that shares a prefix with a previous one finds
+## those keys, and only integrates from the latest shared snapshot onwards.
+## As the chunks never change, the results are identical to a full run.
+
+class Resimulator():
+    """Runs simulations reusing the common prefix of previous ones
+
+    Typical use: what-if analyses, where only the later part of the pivot's
+    input changes between runs. The pivot's input has to be known in advance,
+    so it must be a constant or a Schedule (in acceleration mode).
+
+    Example:
+        resim = Resimulator(pendulum)
+        sol = resim(yinit, ts, schedule, 0.0, True)
+        sol = resim(yinit, ts, modified_schedule, 0.0, True) # Restarts from the last snapshot before the modification
+
+    :param solver: pendulum, double_pendulum, or one of their ensemble forms
+    :param every: number of integration times between snapshots
+    """
+
+    def __init__(self, solver, every=100):
+
+        ## Avoid wrong inputs
+        if (every < 1): # At least one time per chunk
+            raise ValueError('Wrong snapshot period (every). Expected a positive integer')
+
+        self.solver = solver
+        self.every = every
+        self.snapshots = {} # key -> rows of the chunk
+        self.reused = 0 # Integration times reused by the last simulation
+
+    def __call__(self, yinit, ts, pivot_x=0.0, pivot_y=0.0, is_acceleration=False, **kwargs):
+        """Returns the timeseries of a simulation, as the solver would
+
+        :param yinit: initial conditions
+        :param ts: integration times
+        :param pivot_x: the horizontal position (or acceleration) of the pivot
+        :type pivot_x: constant or Schedule
+        :param pivot_y: the vertical position (or acceleration) of the pivot
+        :type pivot_y: constant or Schedule
+        :param is_acceleration: set to True to input pivot accelerations instead of positions
+        :type is_acceleration: boolean
+        :param ``**kwargs``: keyword arguments of the solver
+        :returns: the simulation's timeseries
+        """
+
+        ## Avoid wrong inputs
+        if ('reducers' in kwargs) or kwargs.get('dense', False): # Only timeseries can be reused
+            raise ValueError('Reducers and dense output are not supported by resimulations')
+
+        ts = np.asarray(ts, dtype=float)
+        yinit = np.asarray(yinit, dtype=float)
+        pivots = [_pivot_history(pivot) for pivot in (pivot_x, pivot_y)]
+
+        ## Chunks, as in checkpointed simulations: ts[:every], then overlapping in one time
+        ends = list(range(self.every, len(ts), self.every)) + [len(ts)]
+        keys = self._keys(yinit, ts, ends, pivots, is_acceleration, kwargs)
+
+        ## Latest snapshot already known
+        done = 0
+        while (done < len(keys)) and (keys[done] in self.snapshots):
+            done += 1
+
+        chunks = [self.snapshots[key] for key in keys[:done]]
+        i = ends[done - 1] if done else 0
+        y = chunks[-1][-1] if done else yinit
+        self.reused = i
+
+        ## Integrate the rest
+        ## Each chunk is bounded at its last time, so it never depends on the later input
+        tcrit = np.asarray(kwargs.pop('tcrit', ()), dtype=float)
+        for key, end in zip(keys[done:], ends[done:]):
+            bounded = dict(kwargs, tcrit=np.append(tcrit, ts[end-1]))
+            if i == 0:
+                out = self.solver(y, ts[:end], pivot_x, pivot_y, is_acceleration, **bounded)
+            else:
+                out = self.solver(y, ts[i-1:end], pivot_x, pivot_y, is_acceleration, **bounded)[1:]
+            self.snapshots[key] = out
+            chunks.append(out)
+            i, y = end, out[-1]
+
+        return np.concatenate(chunks)
+
+    def clear(self):
+        """Forgets all the snapshots
+        """
+        self.snapshots.clear()
+
+    def _keys(self, yinit, ts, ends, pivots, is_acceleration, kwargs):
+        """ Returns the key of the snapshot at the end of each chunk
+        """
+
+        base = hashlib.blake2b(digest_size=16)
+        base.update(getattr(self.solver, '__name__', repr(self.solver)).encode('utf-8'))
+        base.update(pickle.dumps((yinit, is_acceleration, sorted(kwargs.items()))))
+
+        keys, start = [], 0
+        for end in ends:
+            base.update(ts[start:end].tobytes()) # The integration times so far
+            start = end
+
+            key = base.copy()
+            for pivot in pivots:
+                key.update(pivot(ts[end - 1]))
+            keys.append(key.hexdigest())
+
+        return keys
+
+def _pivot_history(pivot):
+    """ Returns a function of time t, that returns a digest of the pivot's input until t
+
+    :param pivot: a constant or a Schedule
+    """
+
+    if not isinstance(pivot, Schedule):
+        if callable(pivot): # The future input of arbitrary functions is unknown
+            raise ValueError('Wrong pivot. Resimulations expect constants or Schedules')
+        digest = hashlib.blake2b(pickle.dumps(np.asarray(pivot, dtype=float)), digest_size=16).digest()
+        return lambda t : digest
+
+    ## Hash chain: digests[k] summarizes the first k samples
+    h = hashlib.blake2b(digest_size=16)
+    h.update('{} {}'.format(pivot.hold, pivot.values.shape[1:]).encode('utf-8'))
+    digests = [h.digest()]
+    for t, value in zip(pivot.ts, pivot.values):
+        h.update(np.float64(t).tobytes() + value.tobytes())
+        digests.append(h.digest())
+
+    ## Samples that determine the input until t: those up to t (the first one
+    ## is held before), plus the next one for the linear hold
+    n = len(pivot.ts)
+    if pivot.hold == 'zero':
+        return lambda t : digests[max(np.searchsorted(pivot.ts, t, side='right'), 1)]
+
+    return lambda t : digests[min(np.searchsorted(pivot.ts, t, side='right') + 1, n)]
@@ -0,0 +1,81 @@
+import numpy as np
+
+class Schedule():
+    """Sampled pivot accelerations, such as the output of a controller
+
+    Between samples, the values are either held constant (zero-order hold)
+    or linearly interpolated (linear hold). Before the first sample and after
+    the last one, the closest value is held.
+
+    Schedules can be used as pivot_x or pivot_y in acceleration mode
+    (is_acceleration=True). The solvers restart the integrator at each
+    discontinuity, and only there.
+
+    :param ts: sampling times (strictly increasing)
+    :param values: the accelerations at those times. Use a (len(ts), n) array for an ensemble of n pendula
+    :param hold: 'zero' or 'linear'
+    """
+
+    def __init__(self, ts, values, hold='zero'):
+        self.ts = np.asarray(ts, dtype=float)
+        self.values = np.asarray(values, dtype=float)
+        self.hold = hold
+
+        ## Avoid wrong inputs
+        if (self.ts.ndim != 1) or (len(self.ts) == 0) or np.any(np.diff(self.ts) <= 0):
+            raise ValueError('Wrong sampling times (ts). Expected a strictly increasing vector')
+
+        if (len(self.values) != len(self.ts)): # One value (or row of values) per time
+            raise ValueError('Wrong values. Expected one value per sampling time')
+
+        if hold not in ('zero', 'linear'):
+            raise ValueError('Wrong hold. Use zero or linear')
+
+    def __call__(self, t):
+        """Returns the accelerations at time t
+
+        :param t: the time (or times)
+        :returns: the accelerations
+        """
+
+        n = len(self.ts)
+        if (self.hold == 'zero') or (n == 1):
+            i = np.clip(np.searchsorted(self.ts, t, side='right') - 1, 0, n - 1)
+            return self.values[i]
+
+        ## Linear hold
+        i = np.clip(np.searchsorted(self.ts, t, side='right') - 1, 0, n - 2)
+        w = np.clip((t - self.ts[i]) / (self.ts[i+1] - self.ts[i]), 0.0, 1.0)
+        w = np.reshape(w, np.shape(w) + (1,)*(self.values.ndim - 1))
+        return self.values[i] + w * (self.values[i+1] - self.values[i])
+
+    def discontinuities(self):
+        """Returns the times where the accelerations jump
+
+        :returns: the discontinuities (empty for the linear hold)
+        """
+
+        if self.hold == 'linear':
+            return np.empty(0)
+
+        jumps = (self.values[1:] != self.values[:-1]).reshape(len(self.ts) - 1, -1).any(axis=1)
+        return self.ts[1:][jumps]
+
+    @classmethod
+    def stack(cls, schedules):
+        """Merges the schedules of several pendula into an ensemble schedule
+
+        The schedules may have different sampling times.
+
+        :param schedules: list of schedules, all of them with the same hold
+        :returns: a schedule with one column per input schedule
+        """
+
+        holds = set(s.hold for s in schedules)
+        if len(holds) != 1: # The merge is only exact for a common hold
+            raise ValueError('Wrong schedules. Expected a common hold')
+
+        ts = np.unique(np.concatenate([s.ts for s in schedules]))
+        values = np.stack([s(ts) for s in schedules], axis=-1)
+
+        return cls(ts, values, holds.pop())
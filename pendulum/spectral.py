@@ -0,0 +1,89 @@
+import numpy as np
+from scipy import fft, signal
+from pendulum.reducers import Reducer
+
+class WelchPSD(Reducer):
+    """Welch power spectral density of a state variable, computed online
+
+    The timeseries is received in chunks (e.g.: as a reducer of the solvers
+    or their ensemble forms). Only the samples of the last incomplete segment
+    are kept between chunks, so memory doesn't grow with the horizon. All the
+    segments of a chunk, and all the members of an ensemble, are transformed
+    in a single batched FFT with a precomputed window.
+
+    The result is equivalent to scipy.signal.welch with detrend='constant'
+    and scaling='density'.
+
+    :param index: the state variable (e.g.: 0 for the angle, 1 for the angular speed)
+    :param nperseg: length of each segment
+    :param noverlap: number of samples shared by consecutive segments. Defaults to nperseg // 2
+    :param window: window function, as accepted by scipy.signal.get_window
+    :param fs: sampling frequency. If None, it is deduced from the (equally spaced) integration times
+    :param workers: number of threads used by the FFT
+    """
+
+    def __init__(self, index=0, nperseg=256, noverlap=None, window='hann', fs=None, workers=None):
+        noverlap = nperseg // 2 if noverlap is None else noverlap
+
+        ## Avoid wrong inputs
+        if (nperseg < 2) or not (0 <= noverlap < nperseg):
+            raise ValueError('Wrong segments. Expected nperseg > 1 and 0 <= noverlap < nperseg')
+
+        self.index = index
+        self.nperseg = nperseg
+        self.step = nperseg - noverlap
+        self.window = signal.get_window(window, nperseg)
+        self.given_fs = fs
+        self.workers = workers
+        self.reset()
+
+    def reset(self):
+        self.fs = self.given_fs
+        self.tail = None # Samples not yet assigned to a segment
+        self.last_t = None
+        self.total = 0.0
+        self.count = 0
+
+    def update(self, ts, states):
+        ## Deduce the sampling frequency, once two times are known
+        if (self.fs is None) and (len(ts) > 1):
+            self.fs = 1.0 / (ts[1] - ts[0])
+        elif (self.fs is None) and (self.last_t is not None):
+            self.fs = 1.0 / (ts[0] - self.last_t)
+        self.last_t = ts[-1]
+
+        data = states[..., self.index]
+        if self.tail is not None:
+            data = np.concatenate((self.tail, data), axis=0)
+
+        nseg = (len(data) - self.nperseg) // self.step + 1 if len(data) >= self.nperseg else 0
+        if nseg > 0:
+            ## Batched segments (nseg, ..., nperseg)
+            segments = np.lib.stride_tricks.sliding_window_view(data, self.nperseg, axis=0)[:nseg*self.step:self.step]
+            segments = segments - segments.mean(axis=-1, keepdims=True)
+            spectra = fft.rfft(segments * self.window, axis=-1, workers=self.workers)
+
+            self.total = self.total + np.sum(np.abs(spectra)**2, axis=0)
+            self.count += nseg
+
+        self.tail = data[nseg*self.step:]
+
+    def result(self):
+        """Returns the power spectral density, its dominant frequency, and the corresponding period
+
+        :returns: a dictionary with freqs, psd (with the frequency along the last axis), dominant_frequency and period
+        """
+
+        if (self.count == 0) or (self.fs is None): # A single time has no sampling frequency
+            raise ValueError('Not enough samples. At least nperseg (and two) are needed')
+
+        freqs = fft.rfftfreq(self.nperseg, 1.0 / self.fs)
+        psd = self.total / self.count / (self.fs * np.sum(self.window**2))
+
+        ## One-sided spectrum
+        psd[..., 1:] *= 2
+        if self.nperseg % 2 == 0:
+            psd[..., -1] /= 2
+
+        dominant = freqs[1 + np.argmax(psd[..., 1:], axis=-1)] # Ignoring the mean
+        return {'freqs': freqs, 'psd': psd, 'dominant_frequency': dominant, 'period': 1.0 / dominant}
@@ -0,0 +1,100 @@
+from pendulum.models import *
+from pendulum.archive import *
+import numpy as np
+import pytest
+
+@pytest.mark.parametrize("precision, tol", [('float64', 0.0), ('float32', 1e-6), ('quantized', 1e-5)])
+def test_archive_precision(tmp_path, precision, tol):
+    ''' Test the archived timeseries are recovered within the precision
+    '''
+    ts = np.linspace(0, 20, 2001)
+    sol = double_pendulum((1, 0, 1, 0), ts)
+    path = str(tmp_path / 'runs.pnd')
+
+    with ArchiveWriter(path, precision=precision, tol=1e-5, chunk=300) as writer:
+        writer.add('run', ts, sol, m=(1, 1), g=9.8)
+
+    archive = Archive(path)
+    read_ts, read_sol = archive.read('run')
+
+    assert(np.array_equal(read_ts, ts)), 'The times should be stored exactly'
+    assert(read_sol == pytest.approx(sol, abs=tol))
+    assert(archive.params('run') == {'m': [1, 1], 'g': 9.8})
+
+def test_archive_window(tmp_path):
+    ''' Test reading a time window of a run
+    '''
+    ts = np.linspace(0, 10, 1001)
+    sol = pendulum((1, 0), ts)
+    path = str(tmp_path / 'runs.pnd')
+
+    with ArchiveWriter(path, chunk=100) as writer: # Lossless by default
+        writer.add('run', ts, sol)
+
+    read_ts, read_sol = Archive(path).read('run', 2.05, 3.5)
+
+    keep = (ts >= 2.05) & (ts <= 3.5)
+    assert(np.array_equal(read_ts, ts[keep]))
+    assert(np.array_equal(read_sol, sol[keep]))
+
+def test_archive_streaming(tmp_path):
+    ''' Test writing the runs of an ensemble while they are integrated, and selecting them by parameters
+    '''
+    ts = np.linspace(0, 10, 2501)
+    yinits = np.array([[0.1, 0], [1, 0], [2, 0]])
+    path = str(tmp_path / 'runs.pnd')
+
+    with ArchiveWriter(path, precision='float64') as writer:
+        for l in (1.0, 2.0):
+            pendulum_ensemble(yinits, ts, l=l, reducers={'archive': writer.sink('l={}'.format(l), l=l)})
+
+    archive = Archive(path)
+    assert(archive.runs == ['l=1.0', 'l=2.0'])
+    assert(archive.select(l=2.0) == ['l=2.0'])
+
+    read_ts, read_sol = archive.read('l=2.0')
+    assert(read_sol.shape == (2501, 3, 2))
+    assert(read_sol == pytest.approx(pendulum_ensemble(yinits, ts, l=2.0), abs=1e-4)) # The streamed run restarts the integrator
+
+def test_archive_incomplete(tmp_path):
+    ''' Test unfinished archives don't replace the final path
+    '''
+    path = str(tmp_path / 'runs.pnd')
+    writer = ArchiveWriter(path)
+    writer.add('run', np.linspace(0, 1, 10), np.zeros((10, 2)))
+
+    assert(not (tmp_path / 'runs.pnd').exists())
+    with pytest.raises(ValueError):
+        Archive(path + '.tmp')
+
+@pytest.mark.xfail(raises=ValueError)
+def test_archive_wrong_params(tmp_path):
+    ''' Test wrong input (parameters that can't be stored)
+    '''
+    with ArchiveWriter(str(tmp_path / 'runs.pnd')) as writer:
+        writer.add('run', np.linspace(0, 1, 10), np.zeros((10, 2)), pivot_x=lambda t : t)
+
+def test_archive_exception(tmp_path):
+    ''' Test an exception inside the with block keeps the previous archive
+    '''
+    path = str(tmp_path / 'runs.pnd')
+    with ArchiveWriter(path) as writer:
+        writer.add('good', np.linspace(0, 1, 10), np.zeros((10, 2)))
+
+    with pytest.raises(RuntimeError):
+        with ArchiveWriter(path) as writer:
+            writer.add('x', np.linspace(0, 1, 10), np.ones((10, 2)))
+            raise RuntimeError('Crashed batch')
+
+    assert(Archive(path).runs == ['good'])
+    assert(not (tmp_path / 'runs.pnd.tmp').exists())
+
+@pytest.mark.xfail(raises=ValueError)
+def test_archive_sink_reused(tmp_path):
+    ''' Test wrong input (a sink reused in a second simulation)
+    '''
+    ts = np.linspace(0, 1, 11)
+    with ArchiveWriter(str(tmp_path / 'runs.pnd')) as writer:
+        reducers = {'archive': writer.sink('run')}
+        pendulum((1, 0), ts, reducers=reducers)
+        pendulum((1, 0), ts, reducers=reducers)
@@ -0,0 +1,82 @@
+from pendulum.models import *
+from pendulum.autotune import *
+from pendulum.autotune import _region, _cache
+from pendulum.reducers import MaxAbs
+import json
+import numpy as np
+import pytest
+
+def test_solve_ivp_methods():
+    ''' Test the solvers accept solve_ivp's methods
+    '''
+    ts = np.linspace(0, 5, 51)
+
+    sol = pendulum((1, 0), ts, d=0.2, rtol=1e-10, atol=1e-10)
+    sol_ivp = pendulum((1, 0), ts, d=0.2, method='DOP853', rtol=1e-10, atol=1e-10)
+
+    assert(sol_ivp == pytest.approx(sol, abs=1e-6))
+
+@pytest.mark.parametrize("accuracy", [1e-3, 1e-7])
+def test_autotune_accuracy(accuracy):
+    ''' Test the chosen configuration meets the requested accuracy
+    '''
+    ts = np.linspace(0, 10, 200)
+    yinit = (np.pi/2, 0, np.pi/2, 0)
+
+    config = autotune(double_pendulum, yinit, ts, accuracy=accuracy, probe=0.25, m=(2, 1))
+
+    probe_ts = ts[:50]
+    reference = double_pendulum(yinit, probe_ts, m=(2, 1), method='DOP853', rtol=1e-13, atol=1e-13)
+    sol = double_pendulum(yinit, probe_ts, m=(2, 1), **config)
+    assert(np.max(np.abs(sol - reference)) <= accuracy)
+
+def test_autotune_cache(tmp_path):
+    ''' Test the choice is cached, and not probed again
+    '''
+    calls = []
+    def counted_pendulum(yinit, ts, **kwargs):
+        calls.append(1)
+        return pendulum(yinit, ts, **kwargs)
+
+    cache = str(tmp_path / 'autotune.json')
+    ts = np.linspace(0, 10, 100)
+
+    config = autotune(counted_pendulum, (1, 0), ts, accuracy=1e-5, cache=cache, l=2.0)
+    n_probes = len(calls)
+    again = autotune(counted_pendulum, (1.01, 0), ts, accuracy=1e-5, cache=cache, l=2.001) # Same region
+
+    assert(n_probes > 1)
+    assert(len(calls) == n_probes), \
+        'The second call should use the cache'
+    assert(again == config)
+    with open(cache) as f:
+        assert(list(json.load(f).values()) == [config])
+
+def test_tuned():
+    ''' Test the tuned simulation is close to an accurate one
+    '''
+    ts = np.linspace(0, 5, 100)
+
+    sol = tuned(pendulum, (1, 0), ts, accuracy=1e-6, d=0.1)
+    reference = pendulum((1, 0), ts, d=0.1, rtol=1e-12, atol=1e-12)
+
+    assert(sol == pytest.approx(reference, abs=1e-4))
+
+def test_autotune_anonymous():
+    ''' Test problems with anonymous functions are only cached with an explicit key
+    '''
+    ts = np.linspace(0, 5, 100)
+    slow = lambda t : 0.01*np.cos(t)
+    fast = lambda t : 50*np.cos(7*t)
+
+    assert(_region(pendulum, (1, 0), 1e-6, {'pivot_x': slow}) is None)
+    assert(_region(pendulum, (1, 0), 1e-6, {'pivot_x': slow}, 'slow') != _region(pendulum, (1, 0), 1e-6, {'pivot_x': fast}, 'fast'))
+    assert(_region(pendulum, (1, 0), 1e-6, {'pivot_x': np.sin}) != _region(pendulum, (1, 0), 1e-6, {'pivot_x': np.cos}))
+    assert(_region(pendulum, (1, 0), 1e-6, {'reducers': {'max': object()}}) is None)
+
+    n = len(_cache)
+    config = autotune(pendulum, (1, 0), ts, accuracy=1e-5, pivot_x=fast, is_acceleration=True)
+    assert(len(_cache) == n), 'Anonymous pivots should not be cached'
+
+    res = tuned(pendulum, (1, 0), ts, accuracy=1e-5, reducers={'max': MaxAbs()}, d=0.1)
+    assert(res['max'] == pytest.approx(1.0))
@@ -0,0 +1,50 @@
+from pendulum.models import *
+from pendulum.basins import *
+import numpy as np
+import pytest
+
+def test_basins_damped():
+    ''' Test every initial condition of an unforced damped pendulum ends at rest
+    '''
+    ths, ws = np.meshgrid(np.linspace(-3, 3, 5), np.linspace(-8, 8, 5))
+
+    labels, periods = basins(ths, ws, [(0, 0)], period=1.0, d=1.0, tol=1e-2)
+
+    assert(labels.shape == ths.shape)
+    assert(np.all(labels == 0)), \
+        'All the initial conditions should converge to the stable equilibrium (modulo 2 pi)'
+    assert(periods[2, 2] < periods[0, 0]), \
+        'The initial conditions far from the attractor should take longer'
+
+def test_basins_early_termination():
+    ''' Test unconverged initial conditions are labeled as undetermined
+    '''
+    labels, periods = basins([1.0, 0.0], [0.0, 0.0], [(0, 0)], period=1.0, d=0.01, max_periods=3)
+
+    assert(list(labels) == [-1, 0])
+    assert(list(periods) == [3, 2])
+
+def test_basins_driven():
+    ''' Test the labels are consistent with a long simulation of each initial condition
+    '''
+    period = 2*np.pi/2.0
+    acc_x = lambda t : 5*np.cos(2.0*t)
+    ths = np.array([0.1, 2.0, -2.5])
+    ws = np.array([0.0, 1.0, 3.0])
+
+    ## Attractor: the stroboscopic state after a long transient
+    ts = np.arange(0, 60)*period
+    attractor = pendulum((0, 0), ts, acc_x, 0.0, True, d=0.5)[-1]
+
+    labels, periods = basins(ths, ws, [attractor], period, acc_x, 0.0, True, d=0.5, tol=1e-3)
+
+    for th, w, label in zip(ths, ws, labels):
+        final = pendulum((th, w), ts, acc_x, 0.0, True, d=0.5)[-1]
+        converged = np.hypot((final[0] - attractor[0] + np.pi) % (2*np.pi) - np.pi, final[1] - attractor[1]) < 1e-3
+        assert(converged == (label == 0))
+
+@pytest.mark.xfail(raises=ValueError)
+def test_basins_wrong_damping():
+    ''' Test wrong input (no damping)
+    '''
+    labels, periods = basins([0], [0], [(0, 0)], period=1.0, d=0.0)
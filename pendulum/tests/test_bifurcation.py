@@ -0,0 +1,43 @@
+from pendulum.models import *
+from pendulum.bifurcation import *
+import numpy as np
+import pytest
+
+def test_bifurcation_hysteresis():
+    ''' Test the forward and backward sweeps find coexisting attractors near the resonance
+    '''
+    amplitudes = np.linspace(0.02, 0.2, 10)
+
+    sections = bifurcation('amplitude', amplitudes, frequency=2.9, transient=100, samples=5, processes=1)
+    amps = np.max(np.abs(sections[..., 0]), axis=-1)[0] # Shape (directions, values)
+
+    assert(sections.shape == (1, 2, 10, 5, 2))
+    assert(amps[:, 0] == pytest.approx(amps[0, 0], abs=0.02)), 'A single attractor at small amplitudes'
+    assert(np.max(amps[1] - amps[0]) > 0.3), 'The backward sweep should stay longer in the large oscillations'
+    assert(np.all(np.abs(sections[..., 0]) <= np.pi))
+
+def test_bifurcation_period_one():
+    ''' Test small forcing amplitudes converge to a period-1 attractor, equal to the one of a cold start
+    '''
+    frequencies = (2.0, 4.0)
+
+    sections = bifurcation('frequency', frequencies, directions=('forward',), amplitude=0.01, d=0.5, samples=3, processes=1)
+
+    assert(np.std(sections[0, 0], axis=1) == pytest.approx(0, abs=1e-5)), 'The section should be a fixed point'
+
+    cold = bifurcation('frequency', frequencies[1:], directions=('forward',), amplitude=0.01, d=0.5, samples=3, processes=1)
+    assert(sections[0, 0, 1] == pytest.approx(cold[0, 0, 0], abs=1e-3))
+
+def test_bifurcation_pool():
+    ''' Test the branches give the same results in a pool of processes
+    '''
+    args = ('d', (0.2, 0.3))
+    kwargs = {'yinits': ((0.1, 0), (1, 0)), 'transient': 5, 'warm_transient': 2, 'samples': 2}
+
+    assert(np.array_equal(bifurcation(*args, processes=2, **kwargs), bifurcation(*args, processes=1, **kwargs)))
+
+@pytest.mark.xfail(raises=ValueError)
+def test_bifurcation_wrong_parameter():
+    ''' Test wrong input (parameter)
+    '''
+    bifurcation('m', (1, 2))
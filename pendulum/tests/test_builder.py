@@ -0,0 +1,113 @@
+from pendulum.models import *
+import numpy as np
+import pytest
+
+sp = pytest.importorskip('sympy')
+from pendulum.builder import *
+
+def simple_lagrangian():
+    ''' Returns the Lagrangian of a damped non-inertial pendulum (per unit mass)
+    '''
+    t = sp.Symbol('t')
+    l, g, d = sp.symbols('l g d')
+    th = sp.Function('th')(t)
+    X, Y = pivot(t)
+
+    x = X + l*sp.sin(th)
+    y = Y - l*sp.cos(th)
+    L = (x.diff(t)**2 + y.diff(t)**2)/2 - g*y
+
+    return L, [th], t, [l, g, d], [-d*l**2*th.diff(t)]
+
+def double_lagrangian():
+    ''' Returns the Lagrangian of a non-inertial double pendulum
+    '''
+    t = sp.Symbol('t')
+    m1, m2, l1, l2, g = sp.symbols('m1 m2 l1 l2 g')
+    th1, th2 = sp.Function('th1')(t), sp.Function('th2')(t)
+    X, Y = pivot(t)
+
+    x1 = X + l1*sp.sin(th1)
+    y1 = Y - l1*sp.cos(th1)
+    x2 = x1 + l2*sp.sin(th2)
+    y2 = y1 - l2*sp.cos(th2)
+    T = m1*(x1.diff(t)**2 + y1.diff(t)**2)/2 + m2*(x2.diff(t)**2 + y2.diff(t)**2)/2
+    V = m1*g*y1 + m2*g*y2
+
+    return T - V, [th1, th2], t, [m1, m2, l1, l2, g]
+
+def test_build_pendulum(tmp_path):
+    ''' Test the derived model matches the hand-derived one
+    '''
+    tol = 1e-10
+
+    L, coords, t, params, forces = simple_lagrangian()
+    model = build_model(L, coords, t, params, forces, name='simple', cache_dir=str(tmp_path))
+
+    acc_x = lambda t : np.sin(t)
+    acc_y = lambda t : 0.5 + 0.0*t
+    for state in [(0, 0), (1, 2), (-2, 0.5)]:
+        expected = dpendulum(state, 0.3, acc_x, acc_y, True, l=2, g=9.8, d=0.1)
+        assert(model.derivative(state, 0.3, acc_x, acc_y, True, l=2, g=9.8, d=0.1) == pytest.approx(expected, tol))
+
+    ts = np.linspace(0, 5, 50)
+    sol = model.simulate((1, 0), ts, acc_x, acc_y, True, l=2, g=9.8, d=0.1)
+    expected = pendulum((1, 0), ts, acc_x, acc_y, True, l=2, d=0.1)
+    assert(sol == pytest.approx(expected, abs=1e-5))
+
+def test_build_double_pendulum(tmp_path):
+    ''' Test the derived model and its jacobian match the hand-derived double pendulum
+    '''
+    tol = 1e-10
+
+    L, coords, t, params = double_lagrangian()
+    model = build_model(L, coords, t, params, name='double', cache_dir=str(tmp_path))
+
+    values = {'m1': 2, 'm2': 1, 'l1': 1, 'l2': 0.5, 'g': 9.8}
+    f = lambda state : ddouble_pendulum(state, 0, 1.0, 0.0, True, m=(2, 1), l=(1, 0.5))
+    state = np.array([0.3, -1, 1.2, 0.5])
+
+    assert(model.derivative(state, 0, 1.0, 0.0, True, **values) == pytest.approx(f(state), tol))
+
+    ## Compare the jacobian with finite differences
+    eps = 1e-6
+    jac = model.jac(state, 0, 1.0, 0.0, *[values[p] for p in model.params])
+    for j in range(4):
+        step = eps*np.eye(4)[j]
+        numerical = (np.array(f(state + step)) - np.array(f(state - step)))/(2*eps)
+        assert(jac[:, j] == pytest.approx(numerical, abs=1e-6))
+
+def test_build_cache(tmp_path):
+    ''' Test the generated code is cached
+    '''
+    L, coords, t, params, forces = simple_lagrangian()
+
+    model = build_model(L, coords, t, params, forces, cache_dir=str(tmp_path))
+    mtime = os.path.getmtime(model.path)
+    again = build_model(L, coords, t, params, forces, cache_dir=str(tmp_path))
+
+    assert(again.path == model.path)
+    assert(os.path.getmtime(again.path) == mtime)
+    assert(len(list(tmp_path.iterdir())) == 1)
+
+@pytest.mark.xfail(raises=ValueError)
+def test_build_wrong_lagrangian(tmp_path):
+    ''' Test wrong input (Lagrangian depending on the pivot's position)
+    '''
+    t = sp.Symbol('t')
+    th = sp.Function('th')(t)
+    X, Y = pivot(t)
+
+    L = th.diff(t)**2/2 - X*th # Not invariant under translations of the pivot
+
+    build_model(L, [th], t, cache_dir=str(tmp_path))
+
+@pytest.mark.parametrize("name", ['w0', 'q1', '_x3', 'qdd0', 'lambda', 'state'])
+def test_build_reserved_names(tmp_path, name):
+    ''' Test parameters named as the generated code's variables, or as python keywords, are rejected
+    '''
+    L, coords, t, params, forces = simple_lagrangian()
+    k = sp.Symbol(name)
+
+    with pytest.raises(ValueError):
+        build_model(L + k*coords[0], coords, t, params + [k], forces, cache_dir=str(tmp_path))
@@ -0,0 +1,49 @@
+from pendulum.models import *
+from pendulum.checkpoint import *
+import numpy as np
+import pytest
+
+class Crash(Exception):
+    pass
+
+def test_checkpointed(tmp_path):
+    ''' Test the checkpointed simulation is close to the direct one
+    '''
+    ts = np.linspace(0, 10, 101)
+    yinit = (np.pi/2, 0, np.pi/2, 0)
+
+    sol = checkpointed(double_pendulum, yinit, ts, str(tmp_path), every=30, m=(2, 1))
+    expected = double_pendulum(yinit, ts, m=(2, 1))
+
+    assert(sol.shape == expected.shape)
+    assert(sol[:30] == pytest.approx(expected[:30]))
+    assert(sol == pytest.approx(expected, abs=1e-3))
+
+def test_resume(tmp_path):
+    ''' Test a resumed simulation is bit-for-bit identical to an uninterrupted one
+    '''
+    ts = np.linspace(0, 10, 101)
+    yinit = (1, 0)
+    pos_x = lambda t : np.arctan(5*t)
+
+    def crashing_x(t): # Crashes halfway
+        if t > 5:
+            raise Crash()
+        return pos_x(t)
+
+    expected = checkpointed(pendulum, yinit, ts, str(tmp_path / 'full'), every=20, pivot_x=pos_x, d=0.1)
+
+    with pytest.raises(Crash):
+        checkpointed(pendulum, yinit, ts, str(tmp_path / 'crash'), every=20, pivot_x=crashing_x, d=0.1)
+    sol = resume(str(tmp_path / 'crash'), pivot_x=pos_x)
+
+    assert(np.array_equal(sol, expected))
+
+@pytest.mark.xfail(raises=ValueError)
+def test_resume_missing(tmp_path):
+    ''' Test wrong input (non stored arguments not passed again)
+    '''
+    ts = np.linspace(0, 1, 10)
+    checkpointed(pendulum, (1, 0), ts, str(tmp_path), pivot_x=lambda t : 0.0*t)
+
+    sol = resume(str(tmp_path))
@@ -0,0 +1,111 @@
+from pendulum.models import *
+from pendulum.cli import *
+from pendulum.cli import _format_pivot
+import json
+import subprocess
+import sys
+import numpy as np
+import pytest
+
+def test_lazy_imports():
+    ''' Test the command line interface doesn't import heavy modules on start-up
+    '''
+    code = 'import sys, pendulum.cli; print(sorted(set(sys.modules) & {"numpy", "scipy", "matplotlib"}))'
+    out = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, check=True)
+
+    assert(out.stdout.decode().strip() == '[]')
+
+def test_run(tmp_path):
+    ''' Test a batch of jobs is run and written in bulk
+    '''
+    output = str(tmp_path / 'results.npz')
+    config = {'defaults': {'model': 'pendulum', 'ts': {'start': 0, 'stop': 1, 'num': 11}, 'params': {'l': 2}, 'output': output},
+              'jobs': [{'name': 'still', 'yinit': [0, 0]},
+                       {'name': 'moving', 'yinit': [0, 1], 'params': {'d': 0.5}, 'pivot': {'x': 'np.arctan(5*t)'}},
+                       {'name': 'double', 'model': 'double_pendulum', 'yinit': [0, 1, 0, 0], 'params': {'l': [1, 1]}}]}
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps(config))
+
+    assert(main(['run', '-q', str(path)]) == 0)
+
+    results = np.load(output)
+    ts = np.linspace(0, 1, 11)
+    pos_x = lambda t : np.arctan(5*t)
+    assert(results['moving_ts'] == pytest.approx(ts))
+    assert(results['still'] == pytest.approx(np.zeros((11, 2))))
+    assert(results['moving'] == pytest.approx(pendulum((0, 1), ts, pos_x, l=2, d=0.5)))
+    assert(results['double'].shape == (11, 4))
+
+def test_run_wrong_model(tmp_path):
+    ''' Test wrong input (model)
+    '''
+    config = {'jobs': [{'model': 'triple_pendulum', 'yinit': [0, 0], 'ts': [0, 1], 'output': str(tmp_path / 'out.npz')}]}
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps(config))
+
+    assert(main(['run', '-q', str(path)]) == 1)
+
+def test_run_validation(tmp_path):
+    ''' Test wrong jobs are reported before integrating any of them
+    '''
+    output = str(tmp_path / 'out.npz')
+    good = {'model': 'pendulum', 'yinit': [0, 1], 'ts': [0, 1], 'output': output}
+    wrong_jobs = [{key: value for key, value in good.items() if key != 'ts'}, # Missing times
+                  dict(good, pivot={'x': 'np.sin(t'}), # Syntax error
+                  dict(good, ts={'stop': 1})]
+
+    for wrong in wrong_jobs:
+        logged = []
+        with pytest.raises(ValueError):
+            run_jobs([good, wrong], log=logged.append)
+        assert(logged == []), 'No job should be integrated'
+
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps({'jobs': [good, wrong_jobs[0]]}))
+    assert(main(['run', '-q', str(path)]) == 1)
+
+def test_run_partial(tmp_path):
+    ''' Test the finished jobs are written when a later one fails
+    '''
+    output = str(tmp_path / 'out.npz')
+    jobs = [{'name': 'good', 'model': 'pendulum', 'yinit': [0, 1], 'ts': [0, 1], 'output': output},
+            {'name': 'bad', 'model': 'pendulum', 'yinit': [0, 1], 'ts': [0, 1], 'params': {'l': -1}, 'output': output}]
+
+    with pytest.raises(ValueError):
+        run_jobs(jobs)
+
+    assert(sorted(np.load(output).files) == ['good', 'good_ts'])
+
+def test_run_collisions(tmp_path):
+    ''' Test jobs overwriting each other's results (or times) in the same output are rejected
+    '''
+    job = {'model': 'pendulum', 'yinit': [0, 1], 'ts': [0, 1], 'output': str(tmp_path / 'out.npz')}
+
+    for first, second in (('foo', 'foo'), ('foo', 'foo_ts'), ('foo_ts', 'foo')):
+        logged = []
+        with pytest.raises(ValueError):
+            run_jobs([dict(job, name=first), dict(job, name=second)], log=logged.append)
+        assert(logged == []), 'No job should be integrated'
+
+    ## The same name is fine in different outputs
+    results = run_jobs([dict(job, name='foo'), dict(job, name='foo', output=str(tmp_path / 'other.npz'))])
+    assert(len(results) == 2)
+
+def test_pivot_expression():
+    ''' Test the pivot expressions with numpy constants and ufuncs
+    '''
+    pivot_x, pivot_y, is_acceleration = _format_pivot({'x': '-0.5*np.cos(2*np.pi*t)**2 + np.arctan(t)'}, [0, 1])
+
+    assert(pivot_x(0.3) == pytest.approx(-0.5*np.cos(2*np.pi*0.3)**2 + np.arctan(0.3)))
+
+@pytest.mark.xfail(raises=ValueError)
+@pytest.mark.parametrize("expression", ['__import__("os").getcwd() and t',
+                                        '[c for c in ().__class__.__base__.__subclasses__() if c.__name__=="_wrap_close"][0].__init__.__globals__["system"]("echo ESCAPED") and t',
+                                        'np.save("pwned.npy", t)',
+                                        'np.sin.__call__(t)',
+                                        'np.sin(t, out=t)',
+                                        '"t" * 2'])
+def test_pivot_arbitrary_code(expression):
+    ''' Test wrong input (pivot expressions running arbitrary code)
+    '''
+    _format_pivot({'x': expression}, [0, 1])
@@ -0,0 +1,63 @@
+from pendulum.models import *
+from pendulum.dense import *
+import numpy as np
+import pytest
+
+def test_trajectory_cubic():
+    ''' Test the interpolation is exact for cubic polynomials
+    '''
+    y = lambda t : t**3 - 2*t
+    dy = lambda t : 3*t**2 - 2
+    knots = np.array([0, 0.5, 2, 3])
+
+    traj = Trajectory(knots, y(knots)[:, None], dy(knots)[:, None])
+    ts = np.linspace(0, 3, 31)
+
+    assert(traj(ts)[:, 0] == pytest.approx(y(ts)))
+    assert(traj.span == (0, 3))
+
+def test_dense_pendulum():
+    ''' Test the dense output can be resampled to any time grid
+    '''
+    ts = np.linspace(0, 10, 11)
+    yinit = (1, 0)
+    pos_x = lambda t : np.arctan(5*t)
+
+    traj = pendulum(yinit, ts, pos_x, d=0.2, dense=True, rtol=1e-9, atol=1e-9)
+
+    for fine_ts in (np.linspace(0, 10, 1001), np.linspace(2, 3, 7)):
+        expected = pendulum(yinit, np.concatenate(([0], fine_ts)), pos_x, d=0.2, rtol=1e-10, atol=1e-10)[1:]
+        assert(traj(fine_ts) == pytest.approx(expected, abs=1e-5))
+
+def test_dense_schedule():
+    ''' Test the dense output across the discontinuities of a zero-order hold
+    '''
+    schedule = Schedule((0, 1, 2), (0, 3, -3))
+    ts = np.linspace(0, 3, 301)
+
+    traj = pendulum((0, 0), ts, schedule, 0.0, True, dense=True, rtol=1e-10, atol=1e-10)
+    expected = pendulum((0, 0), ts, schedule, 0.0, True, rtol=1e-10, atol=1e-10)
+
+    assert(traj(ts) == pytest.approx(expected, abs=1e-6))
+    assert(np.sum(traj.ts == 1) == 2), \
+        'The discontinuities should be repeated knots'
+
+def test_dense_ensemble():
+    ''' Test the dense output keeps the shape of the ensembles
+    '''
+    yinits = np.array([[0, 1, 0, 0], [0.1, 0, 0.2, 0]])
+    ts = np.linspace(0, 1, 5)
+
+    traj = double_pendulum_ensemble(yinits, ts, dense=True)
+
+    assert(traj(0.5).shape == (2, 4))
+    assert(traj(ts).shape == (5, 2, 4))
+    assert(traj(0) == pytest.approx(yinits))
+
+@pytest.mark.xfail(raises=ValueError)
+def test_trajectory_extrapolation():
+    ''' Test wrong input (times out of the simulated interval)
+    '''
+    traj = pendulum((1, 0), np.linspace(0, 1, 10), dense=True)
+
+    traj(2.0)
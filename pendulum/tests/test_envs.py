@@ -0,0 +1,66 @@
+from pendulum.models import *
+from pendulum.envs import *
+import numpy as np
+import tracemalloc
+import pytest
+
+@pytest.mark.parametrize("env, solver, yinit", [
+    (PendulumVecEnv(1, d=0.1, low=0.3, high=0.3), lambda y, ts, ax, ay : pendulum(y, ts, ax, ay, True, d=0.1, rtol=1e-12, atol=1e-12), (0.3, 0.3)),
+    (DoublePendulumVecEnv(1, low=0.3, high=0.3), lambda y, ts, ax, ay : double_pendulum(y, ts, ax, ay, True, rtol=1e-12, atol=1e-12), (0.3, 0.3, 0.3, 0.3)),
+])
+def test_env_vs_solver(env, solver, yinit):
+    ''' Test the environments follow the same dynamics as the solvers
+    '''
+    ts = np.linspace(0, 1, 101)
+
+    env.reset()
+    for _ in ts[1:]:
+        obs, rewards, terminated, truncated = env.step(np.array([[0.5, 0.2]]))
+
+    expected = solver(yinit, ts, 0.5, 0.2)[-1]
+
+    assert(obs[0] == pytest.approx(expected, abs=1e-6))
+    assert(rewards[0] == pytest.approx(-np.sum(np.cos(expected[::2]))))
+
+@pytest.mark.parametrize("Env", [PendulumVecEnv, DoublePendulumVecEnv])
+def test_env_buffers(Env):
+    ''' Test the steps reuse the same buffers, and allocate no new arrays
+    '''
+    env = Env(10000, max_steps=100)
+    actions = np.zeros(10000)
+    obs = env.reset(seed=0)
+    env.step(actions)
+
+    tracemalloc.start()
+    for _ in range(10):
+        out = env.step(actions)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert(out[0] is obs)
+    assert(peak < 10000), 'A single new array would take 80000 bytes'
+
+def test_env_autoreset():
+    ''' Test terminated and truncated environments are reset in place
+    '''
+    env = PendulumVecEnv(3, max_steps=5, terminate=lambda obs : obs[:, 1] > 0.5, low=(0, 1), high=(0, 1))
+    env.reset()
+    env.state[1, 1:] = 0.0 # Only the first environment will be terminated
+
+    obs, rewards, terminated, truncated = env.step(np.zeros(3))
+    assert(np.all(terminated == (True, False, False)))
+    assert(obs[0] == pytest.approx((0, 1))), 'The first environment should start again'
+    assert(env.final_obs[0, 0] == pytest.approx(0.01, rel=1e-2))
+
+    for _ in range(4):
+        obs, rewards, terminated, truncated = env.step(np.zeros(3))
+    assert(np.all(truncated == (False, True, True)))
+    assert(np.all(env.steps[1:] == 0))
+
+@pytest.mark.xfail(raises=ValueError)
+def test_env_wrong_actions():
+    ''' Test wrong input (actions)
+    '''
+    env = DoublePendulumVecEnv(4)
+    env.reset()
+    env.step(np.zeros((4, 3)))
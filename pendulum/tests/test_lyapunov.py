@@ -0,0 +1,48 @@
+from pendulum.models import *
+from pendulum.lyapunov import *
+import numpy as np
+import pytest
+
+def test_lyapunov_regular_and_chaotic():
+    ''' Test the spectra of a regular and a chaotic double pendulum
+    '''
+    yinits = [(0.05, 0, 0.05, 0), # Small oscillations: regular
+              (np.pi/2, 0, np.pi/2, 0)] # Large oscillations: chaotic
+
+    spectra, ts = lyapunov_spectrum(yinits, t_max=50, check=10, tol=1e-6)
+
+    assert(spectra.shape == (2, 4))
+    assert(np.all(np.diff(spectra, axis=1) <= 0)), \
+        'The exponents should be sorted in decreasing order'
+    assert(spectra[0] == pytest.approx(0, abs=0.1))
+    assert(spectra[1, 0] > 0.5)
+    assert(np.sum(spectra, axis=1) == pytest.approx(0, abs=1e-2)), \
+        'The phase space volume of an undamped double pendulum is conserved'
+    assert(spectra[1, 0] == pytest.approx(-spectra[1, 3], abs=0.05)), \
+        'Hamiltonian exponents come in opposite pairs'
+
+def test_lyapunov_batch():
+    ''' Test the batch is equivalent to separate calls, also with per-member parameters
+    '''
+    yinits = [(np.pi/2, 0, np.pi/2, 0), (1, 0, -1, 0)]
+    m = (1, (1, 2))
+
+    spectra, ts = lyapunov_spectrum(yinits, m=m, t_max=5, check=5)
+    for i in range(2):
+        single, single_ts = lyapunov_spectrum(yinits[i:i+1], m=(1, m[1][i]), t_max=5, check=5)
+        assert(spectra[i] == pytest.approx(single[0], abs=1e-8))
+
+def test_lyapunov_early_stopping():
+    ''' Test converged members stop early
+    '''
+    yinits = [(0.0, 0, 0.0, 0), (np.pi/2, 0, np.pi/2, 0)] # The first one is an equilibrium
+
+    spectra, ts = lyapunov_spectrum(yinits, t_max=40, check=2, tol=1e-2)
+
+    assert(ts[0] < ts[1] == 40)
+
+@pytest.mark.xfail(raises=ValueError)
+def test_lyapunov_wrong_yinits():
+    ''' Test wrong input (initial conditions)
+    '''
+    spectra, ts = lyapunov_spectrum([(0, 0)])
@@ -0,0 +1,75 @@
+from pendulum.models import *
+from pendulum.network import *
+from pendulum.network import _laplacian, _jacobian
+from pendulum.models import _format_accelerations
+import numpy as np
+from scipy import sparse
+import pytest
+
+def test_uncoupled_network():
+    ''' Test an uncoupled network behaves as independent pendula
+    '''
+    ts = np.linspace(0, 5, 51)
+    ths, ws = np.array([0.1, 1.0, -0.5]), np.array([0.0, 0.5, 1.0])
+    ls = np.array([1.0, 2.0, 0.5])
+    acc_x = lambda t : np.sin(t)
+
+    sol = network(np.concatenate((ths, ws)), ts, None, acc_x, 0.0, True, l=ls, d=0.2, rtol=1e-9, atol=1e-9)
+
+    for i in range(3):
+        expected = pendulum((ths[i], ws[i]), ts, acc_x, 0.0, True, l=ls[i], d=0.2, rtol=1e-9, atol=1e-9)
+        assert(sol[:, [i, 3+i]] == pytest.approx(expected, abs=1e-5))
+
+def test_coupled_network_modes():
+    ''' Test the in-phase mode of two identical coupled pendula doesn't feel the spring
+    '''
+    ts = np.linspace(0, 5, 51)
+    coupling = sparse.csr_matrix([[0, 3.0], [3.0, 0]])
+
+    in_phase = network((0.2, 0.2, 0, 0), ts, coupling, rtol=1e-9, atol=1e-9)
+    anti_phase = network((0.2, -0.2, 0, 0), ts, coupling, rtol=1e-9, atol=1e-9)
+    free = pendulum((0.2, 0), ts, rtol=1e-9, atol=1e-9)
+
+    assert(in_phase[:, 0] == pytest.approx(free[:, 0], abs=1e-5))
+    assert(in_phase[:, 0] == pytest.approx(in_phase[:, 1], abs=1e-8))
+    assert(anti_phase[:, 0] != pytest.approx(free[:, 0], abs=1e-2)), \
+        'The spring should act on the anti-phase mode'
+
+def test_network_jacobian():
+    ''' Test the sparse jacobian against finite differences
+    '''
+    n = 50
+    rng = np.random.default_rng(0)
+    coupling = sparse.random(n, n, density=0.1, random_state=0)
+    lap = _laplacian(coupling, n)
+    accel_x, accel_y = _format_accelerations(1.0, 0.5, True, 1e-4)
+    state = rng.normal(size=2*n)
+
+    jac = _jacobian(state, 0, lap, accel_x, accel_y, 1.5, 9.8, 0.3)
+    assert(sparse.issparse(jac))
+
+    eps = 1e-6
+    for j in rng.choice(2*n, 5):
+        step = eps*np.eye(2*n)[j]
+        numerical = (dnetwork(state + step, 0, coupling, 1.0, 0.5, True, 1.5, 9.8, 0.3) - dnetwork(state - step, 0, coupling, 1.0, 0.5, True, 1.5, 9.8, 0.3))/(2*eps)
+        assert(jac[:, j].toarray().ravel() == pytest.approx(numerical, abs=1e-6))
+
+def test_large_ring():
+    ''' Test a large ring of coupled pendula can be simulated
+    '''
+    n = 5000
+    ring = sparse.diags([np.ones(n-1), np.ones(n-1)], [-1, 1], format='csr')
+    yinit = np.zeros(2*n)
+    yinit[0] = 0.5 # Kick a single pendulum
+
+    sol = network(yinit, np.linspace(0, 1, 11), ring, d=0.1)
+
+    assert(sol.shape == (11, 2*n))
+    assert(sol[-1, 1] != 0.0), \
+        'The perturbation should propagate to the neighbours'
+
+@pytest.mark.xfail(raises=ValueError)
+def test_network_wrong_coupling():
+    ''' Test wrong input (coupling matrix)
+    '''
+    sol = network((0, 0, 0, 0), np.linspace(0, 1, 10), sparse.identity(3))
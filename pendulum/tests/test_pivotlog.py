@@ -0,0 +1,53 @@
+from pendulum.models import *
+from pendulum.pivotlog import *
+import numpy as np
+import pytest
+
+@pytest.fixture
+def csv_log(tmp_path):
+    ''' Writes a messy pivot log: unsorted, with artifacts and repeated times
+    '''
+    ts = np.linspace(-1, 1, 201)
+    rows = ['{},{},0,{}'.format(t, np.sin(t), 'foo') for t in ts[::-1]]
+    rows.insert(10, '0.5,,0,foo') # Missing value
+    rows.append('{},{},0,foo'.format(ts[0], np.sin(ts[0]))) # Repeated time
+
+    path = tmp_path / 'log.csv'
+    path.write_text('\ufefft,x,y,comment\n' + '\n'.join(rows) + '\n', encoding='utf-8')
+
+    return str(path)
+
+def test_convert(csv_log, tmp_path):
+    ''' Test the log is cleaned and sorted
+    '''
+    out = str(tmp_path / 'log.npy')
+    n = convert(csv_log, out, chunksize=17)
+
+    log = PivotLog(out)
+    assert(n == len(log) == 201)
+    assert(np.all(np.diff(log.ts) > 0)), \
+        'The times are not sorted'
+    assert(log.data[1] == pytest.approx(np.sin(log.ts)))
+
+def test_pivot(csv_log, tmp_path):
+    ''' Test the interpolated pivot only covers the requested window, and plugs into pendulum
+    '''
+    out = str(tmp_path / 'log.npy')
+    convert(csv_log, out)
+    log = PivotLog(out)
+
+    assert(log.window(0, 0.1).shape[1] < 20)
+
+    pos_x, pos_y = log.pivot(0, 0.5)
+    assert(pos_x(0.25) == pytest.approx(np.sin(0.25), 1e-6))
+    assert(pos_y(0.25) == pytest.approx(0.0))
+
+    ts = np.linspace(0, 0.5, 10)
+    sol = pendulum((0, 0), ts, pos_x, pos_y)
+    assert(sol.shape == (10, 2))
+
+@pytest.mark.xfail(raises=ValueError)
+def test_convert_wrong_columns(csv_log, tmp_path):
+    ''' Test wrong input (columns)
+    '''
+    convert(csv_log, str(tmp_path / 'log.npy'), columns=('t', 'z'))
@@ -0,0 +1,63 @@
+from pendulum.models import *
+from pendulum.reducers import *
+import numpy as np
+import pytest
+
+def test_reducers_pendulum():
+    ''' Test the reducers agree with the statistics of the full timeseries
+    '''
+    tol = 1e-6
+
+    ts = np.linspace(0, 30, 3001) # Longer than a chunk
+    yinit = (1, 0)
+    d = 0.5
+    sol = pendulum(yinit, ts, d=d)
+
+    reducers = {'max_th': MaxAbs(0), 'rms_w': RMS(1), 'energy': Energy(), 'settling': SettlingTime(tol=0.1)}
+    res = pendulum(yinit, ts, d=d, reducers=reducers)
+
+    es = pendulum_energy(sol)
+    outside = np.where(np.any(np.abs(sol) > 0.1, axis=1))[0][-1]
+
+    assert(res['max_th'] == pytest.approx(np.max(np.abs(sol[:, 0])), tol))
+    assert(res['rms_w'] == pytest.approx(np.sqrt(np.mean(sol[:, 1]**2)), tol))
+    assert(res['energy']['max'] == pytest.approx(es[0], tol))
+    assert(res['energy']['drift'] == pytest.approx(es[-1] - es[0], abs=tol))
+    assert(res['settling'] == pytest.approx(ts[outside + 1]))
+
+def test_reducers_ensemble():
+    ''' Test the reducers keep one result per member of an ensemble
+    '''
+    tol = 1e-6
+
+    ts = np.linspace(0, 5, 2001)
+    yinits = np.array([[0, 1, 0, 0], [0.1, 0, 0.1, 0]])
+
+    res = double_pendulum_ensemble(yinits, ts, reducers={'energy': Energy(), 'max_th2': MaxAbs(2)})
+
+    sol = double_pendulum_ensemble(yinits, ts)
+    assert(res['max_th2'] == pytest.approx(np.max(np.abs(sol[:, :, 2]), axis=0), tol))
+    assert(res['energy']['drift'] == pytest.approx((0, 0), abs=1e-3)), \
+        'The energy of an undamped double pendulum should be conserved'
+
+def test_reducers_reused():
+    ''' Test a dictionary of reducers can be reused across simulations
+    '''
+    ts = np.linspace(0, 10, 1001)
+    reducers = {'max': MaxAbs(0), 'rms': RMS(1)}
+
+    first = pendulum((1, 0), ts, reducers=reducers)
+    second = pendulum((0.1, 0), ts, reducers=reducers)
+    assert(first['max'] == pytest.approx(1.0))
+    assert(second['max'] == pytest.approx(0.1))
+
+    single = pendulum((0.5, 0), ts[:1], reducers=reducers)
+    assert(single == {'max': 0.5, 'rms': 0.0})
+
+def test_settling_time_unsettled():
+    ''' Test the settling time of a never settling pendulum
+    '''
+    ts = np.linspace(0, 10, 100)
+    res = pendulum((1, 0), ts, reducers={'settling': SettlingTime(tol=0.1)})
+
+    assert(np.isnan(res['settling']))
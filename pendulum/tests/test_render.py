@@ -0,0 +1,88 @@
+from pendulum.models import *
+from pendulum.render import *
+import numpy as np
+import pytest
+
+def test_cartesian_pendulum():
+    ''' Test the cartesian coordinates of a simple pendulum
+    '''
+    tol = 1e-8
+
+    ts = np.linspace(0, 1, 3)
+    sol = np.array([[0, 0], [np.pi/2, 0], [np.pi, 0]])
+    pos_x = lambda t : 1.0*t
+
+    coords = cartesian(sol, ts, pos_x, 0.0, l=2)
+
+    assert(coords.shape == (3, 2, 2))
+    assert(coords[:, 0, 0] == pytest.approx(ts, tol)), \
+        'The pivot is not moving as expected'
+    assert(coords[0, 1] == pytest.approx((0, -2), abs=tol))
+    assert(coords[1, 1] == pytest.approx((0.5 + 2, 0), abs=tol))
+    assert(coords[2, 1] == pytest.approx((1, 2), abs=tol))
+
+def test_cartesian_double_pendulum():
+    ''' Test the cartesian coordinates of a double pendulum
+    '''
+    tol = 1e-8
+
+    ts = np.linspace(0, 1, 2)
+    sol = np.array([[0, 0, 0, 0], [np.pi/2, 0, 0, 0]])
+
+    coords = cartesian(sol, ts, l=(1, 2))
+
+    assert(coords.shape == (2, 3, 2))
+    assert(coords[0, 2] == pytest.approx((0, -3), abs=tol))
+    assert(coords[1, 2] == pytest.approx((1, -2), abs=tol))
+
+@pytest.mark.xfail(raises=ValueError)
+def test_cartesian_wrong_l():
+    ''' Test wrong input (lengths)
+    '''
+    ts = np.linspace(0, 1, 2)
+    sol = np.zeros((2, 4))
+
+    coords = cartesian(sol, ts, l=1.0) # Wrong, a double pendulum needs two lengths
+
+def test_decimate():
+    ''' Test the frame selection
+    '''
+    ts = np.linspace(0, 10, 1001)
+
+    idx = decimate(ts, fps=10)
+
+    assert(len(idx) == 100)
+    assert(ts[idx] == pytest.approx(np.arange(0, 10, 0.1)))
+    assert(len(decimate(ts)) == len(ts))
+
+def test_decimate_coarse():
+    ''' Test coarse timeseries repeat frames, so the video keeps the simulated duration
+    '''
+    ts = np.linspace(0, 10, 11)
+
+    idx = decimate(ts, fps=30)
+
+    assert(len(idx) == 300)
+    assert(np.all(np.abs(ts[idx] - np.arange(300)/30) <= 0.5))
+
+    frames = []
+    n = render(pendulum((1, 0), ts), ts, frames.append, fps=3, size=(1, 1), dpi=10, processes=1)
+    assert(n == len(frames) == 30)
+    assert(np.array_equal(frames[0], frames[1]))
+
+def test_render_sequence(tmp_path):
+    ''' Test the frames are rendered and written in order, both serially and in parallel
+    '''
+    ts = np.linspace(0, 1, 50)
+    sol = pendulum((1, 0), ts)
+
+    serial, parallel = [], []
+    n = render(sol, ts, serial.append, fps=10, size=(1, 1), dpi=20, processes=1, chunksize=2)
+    render(sol, ts, parallel.append, fps=10, size=(1, 1), dpi=20, processes=2, chunksize=2)
+
+    assert(n == len(serial) == len(parallel) == 10)
+    assert(serial[0].shape == (20, 20, 3))
+    assert(all(np.array_equal(a, b) for a, b in zip(serial, parallel)))
+
+    render(sol, ts, str(tmp_path / 'im_%03d.png'), fps=10, size=(1, 1), dpi=20, processes=1)
+    assert(len(list(tmp_path.glob('im_*.png'))) == 10)
@@ -0,0 +1,65 @@
+from pendulum.models import *
+from pendulum.resimulate import *
+import numpy as np
+import pytest
+
+@pytest.mark.parametrize("hold, reused", [('zero', 1500), ('linear', 1500)])
+def test_resimulate_tail(hold, reused):
+    ''' Test a modified tail of the pivot's input restarts from the last snapshot before the modification
+    '''
+    ts = np.linspace(0, 20, 2001)
+    sample_ts = np.arange(0, 20, 0.5)
+    values = np.sin(sample_ts)
+    modified = values.copy()
+    modified[sample_ts >= 16] = 0 # The first modified sample, at t = 16
+
+    resim = Resimulator(pendulum, every=500)
+    original = resim((1, 0), ts, Schedule(sample_ts, values, hold), 0.0, True, d=0.1)
+    assert(resim.reused == 0)
+
+    sol = resim((1, 0), ts, Schedule(sample_ts, modified, hold), 0.0, True, d=0.1)
+    assert(resim.reused == reused)
+    assert(np.array_equal(sol[:1501], original[:1501]))
+
+    expected = Resimulator(pendulum, every=500)((1, 0), ts, Schedule(sample_ts, modified, hold), 0.0, True, d=0.1)
+    assert(np.array_equal(sol, expected)), 'A resimulation should be identical to a full run'
+
+def test_resimulate_boundary():
+    ''' Test a modification just after a snapshot doesn't affect the reused chunks
+    '''
+    ts = np.linspace(0, 20, 2001)
+    yinit = (0.1, 0) # Small oscillations: long steps, that would overshoot the chunks
+
+    resim = Resimulator(pendulum, every=500)
+    resim(yinit, ts, Schedule((0, 15.0005, 20), (0, 0, 0)), 0.0, True)
+    sol = resim(yinit, ts, Schedule((0, 15.0005, 20), (0, 50, 50)), 0.0, True)
+    assert(resim.reused == 1500)
+
+    expected = Resimulator(pendulum, every=500)(yinit, ts, Schedule((0, 15.0005, 20), (0, 50, 50)), 0.0, True)
+    assert(np.array_equal(sol, expected))
+
+def test_resimulate_keys():
+    ''' Test changes of other arguments are not mistaken for the same simulation
+    '''
+    ts = np.linspace(0, 5, 501)
+    yinits = np.array([[0.1, 0, 0.2, 0], [1, 0, 0, 0]])
+
+    resim = Resimulator(double_pendulum_ensemble, every=100)
+    sol = resim(yinits, ts)
+
+    resim(yinits, ts)
+    assert(resim.reused == 501)
+    resim(yinits, ts, l=(1, 2))
+    assert(resim.reused == 0)
+    resim(yinits, ts[:351]) # Shorter horizon: only the last chunk changes
+    assert(resim.reused == 300)
+    resim(yinits, np.linspace(0, 5, 1001))
+    assert(resim.reused == 0)
+
+    assert(sol == pytest.approx(double_pendulum_ensemble(yinits, ts), abs=1e-5))
+
+@pytest.mark.xfail(raises=ValueError)
+def test_resimulate_wrong_pivot():
+    ''' Test wrong input (pivot given as a function)
+    '''
+    Resimulator(pendulum)((1, 0), np.linspace(0, 1, 10), lambda t : np.sin(t))
@@ -0,0 +1,98 @@
+from pendulum.models import *
+from pendulum.schedules import *
+import numpy as np
+import pytest
+
+def test_schedule_holds():
+    ''' Test the zero and linear holds
+    '''
+    ts = (0, 1, 2, 3)
+    values = (1, 1, 3, 0)
+
+    zero = Schedule(ts, values, hold='zero')
+    linear = Schedule(ts, values, hold='linear')
+
+    assert(zero(np.array([-1, 0, 0.5, 1.5, 2, 10])) == pytest.approx((1, 1, 1, 1, 3, 0)))
+    assert(linear(np.array([-1, 0.5, 1.5, 2.5, 10])) == pytest.approx((1, 1, 2, 1.5, 0)))
+    assert(zero.discontinuities() == pytest.approx((2, 3))), \
+        'Repeated values should not be considered discontinuities'
+    assert(len(linear.discontinuities()) == 0)
+
+def test_schedule_stack():
+    ''' Test the merge of schedules with different sampling times
+    '''
+    a = Schedule((0, 1), (1, 2))
+    b = Schedule((0, 0.5), (3, 4))
+
+    both = Schedule.stack([a, b])
+
+    assert(both.ts == pytest.approx((0, 0.5, 1)))
+    for t in (0.25, 0.75, 2):
+        assert(both(t) == pytest.approx((a(t), b(t))))
+
+def test_pendulum_schedule():
+    ''' Test a single call with a zero-order hold equals a call per segment
+    '''
+    tol = 1e-6
+
+    accels = (0, 1, -1, 0.5)
+    schedule = Schedule((0, 1, 2, 3), accels)
+    ts = np.linspace(0, 4, 41)
+
+    sol = pendulum((0, 0), ts, schedule, 0.0, is_acceleration=True, rtol=1e-10, atol=1e-10)
+
+    ## Reference: one call per segment
+    y = (0, 0)
+    for i, accel in enumerate(accels):
+        seg_ts = ts[10*i:10*i+11]
+        seg_sol = pendulum(y, seg_ts, accel, 0.0, is_acceleration=True, rtol=1e-10, atol=1e-10)
+        assert(sol[10*i:10*i+11] == pytest.approx(seg_sol, abs=tol))
+        y = seg_sol[-1]
+
+def test_pendulum_ensemble():
+    ''' Test the ensemble is equivalent to independent simulations
+    '''
+    tol = 1e-6
+
+    yinits = np.array([[0, 1], [1, 0], [0.5, -0.5]])
+    ls = np.array([1, 2, 0.5])
+    schedule = Schedule.stack([Schedule((0, 1), (0, 1)), Schedule((0, 2), (1, -1)), Schedule((0,), (0.5,))])
+    ts = np.linspace(0, 3, 31)
+
+    sol = pendulum_ensemble(yinits, ts, schedule, 0.0, True, l=ls, d=0.1, rtol=1e-10, atol=1e-10)
+
+    assert(sol.shape == (31, 3, 2))
+    for i in range(3):
+        accel = Schedule(schedule.ts, schedule.values[:, i])
+        expected = pendulum(yinits[i], ts, accel, 0.0, True, l=ls[i], d=0.1, rtol=1e-10, atol=1e-10)
+        assert(sol[:, i, :] == pytest.approx(expected, abs=tol))
+
+def test_double_pendulum_ensemble():
+    ''' Test the ensemble is equivalent to independent simulations
+    '''
+    tol = 1e-6
+
+    yinits = np.array([[0, 1, 0, 0], [1, 0, -1, 0]])
+    m = (1, np.array([1, 2]))
+    ts = np.linspace(0, 2, 21)
+
+    sol = double_pendulum_ensemble(yinits, ts, m=m, rtol=1e-10, atol=1e-10)
+
+    for i in range(2):
+        expected = double_pendulum(yinits[i], ts, m=(1, m[1][i]), rtol=1e-10, atol=1e-10)
+        assert(sol[:, i, :] == pytest.approx(expected, abs=tol))
+
+@pytest.mark.xfail(raises=ValueError)
+def test_schedule_wrong_mode():
+    ''' Test wrong input (schedules as positions)
+    '''
+    schedule = Schedule((0, 1), (0, 1))
+    ts = np.linspace(0, 2, 10)
+
+    sol = pendulum((0, 0), ts, schedule, 0.0, is_acceleration=False)
+
+@pytest.mark.xfail(raises=ValueError)
+def test_schedule_wrong_ts():
+    ''' Test wrong input (sampling times)
+    '''
+    schedule = Schedule((0, 1, 1), (0, 1, 2))
@@ -0,0 +1,62 @@
+from pendulum.models import *
+from pendulum.spectral import *
+import numpy as np
+from scipy import signal
+import pytest
+
+def test_welch_streaming():
+    ''' Test the streamed estimate equals scipy's welch on the whole signal
+    '''
+    rng = np.random.default_rng(0)
+    ts = np.arange(5000) * 0.01
+    xs = np.sin(2*np.pi*3*ts)[:, None] + rng.normal(size=(len(ts), 3))
+    states = xs[..., None] # One state variable
+
+    psd = WelchPSD(nperseg=128, noverlap=40)
+    for i in range(0, len(ts), 333): # Uneven chunks
+        psd.update(ts[i:i+333], states[i:i+333])
+    res = psd.result()
+
+    freqs, expected = signal.welch(xs, fs=100, nperseg=128, noverlap=40, axis=0)
+
+    assert(res['freqs'] == pytest.approx(freqs))
+    assert(res['psd'] == pytest.approx(expected.T))
+    assert(res['dominant_frequency'] == pytest.approx((3, 3, 3), abs=100/128))
+
+def test_welch_ensemble():
+    ''' Test the dominant periods of an ensemble of small oscillations
+    '''
+    ls = np.array([0.5, 1.0, 2.0])
+    yinits = np.array([[0.01, 0], [0.01, 0], [0.01, 0]])
+    ts = np.linspace(0, 200, 20001)
+
+    res = pendulum_ensemble(yinits, ts, l=ls, reducers={'spectrum': WelchPSD(nperseg=8192)})
+    periods = res['spectrum']['period']
+
+    expected = 2*np.pi*np.sqrt(ls/9.8)
+    assert(periods == pytest.approx(expected, rel=0.02))
+
+def test_welch_single_times():
+    ''' Test chunks of a single time, including the first one
+    '''
+    ts = np.arange(1000) * 0.01
+    states = np.sin(2*np.pi*5*ts)[:, None, None]
+
+    psd = WelchPSD(nperseg=128)
+    psd.update(ts[:1], states[:1])
+    psd.update(ts[1:2], states[1:2])
+    psd.update(ts[2:], states[2:])
+
+    assert(psd.result()['dominant_frequency'] == pytest.approx(5, abs=100/128))
+
+@pytest.mark.xfail(raises=ValueError)
+def test_welch_single_time():
+    ''' Test wrong input (a simulation of a single time)
+    '''
+    pendulum((1, 0), [0.0], reducers={'p': WelchPSD()})
+
+@pytest.mark.xfail(raises=ValueError)
+def test_welch_wrong_segments():
+    ''' Test wrong input (overlap)
+    '''
+    psd = WelchPSD(nperseg=128, noverlap=128)
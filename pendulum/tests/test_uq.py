@@ -0,0 +1,57 @@
+from pendulum.models import *
+from pendulum.uq import *
+import numpy as np
+from scipy import stats
+import pytest
+
+def test_uq_linear():
+    ''' Test the estimates for small oscillations, where the final angle is linear in the initial conditions
+    '''
+    ts = np.linspace(0, 1, 11)
+    w = np.sqrt(9.8)
+    a, b = np.cos(w), np.sin(w)/w # th(1) = a th_0 + b w_0
+
+    res = propagate(pendulum, {'th': (0, 0.02), 'w': stats.norm(0, 0.01)}, (0, 0), ts, seed=0, rtol=1e-10, atol=1e-12)
+
+    V = np.array([a**2 * 0.02**2/12, b**2 * 0.01**2])
+    assert(res['converged'])
+    assert(res['names'] == ['th', 'w'])
+    assert(res['mean'] == pytest.approx(a*0.01, rel=1e-2))
+    assert(res['std'] == pytest.approx(np.sqrt(np.sum(V)), rel=5e-2))
+    assert(res['first_order'] == pytest.approx(V/np.sum(V), abs=5e-2))
+    assert(res['total'] == pytest.approx(V/np.sum(V), abs=5e-2))
+    assert(res['simulations'] == 4*res['n'])
+
+def test_uq_double():
+    ''' Test uncertain parameters of the double pendulum, with a quantity of interest per time
+    '''
+    ts = np.linspace(0, 1, 11)
+    qoi = lambda ts, sol : sol[:, :, 2].T # The timeseries of the second angle
+
+    res = propagate('double_pendulum', {'m2': (0.5, 1.5), 'l1': (0.9, 1.1)}, (0.5, 0, 0.5, 0), ts, qoi=qoi, l=(1, 2), seed=0, n_max=256)
+
+    assert(res['mean'].shape == (11,))
+    assert(res['quantiles'].shape == (3, 11))
+    assert(res['first_order'].shape == (2, 11))
+    assert(np.all(res['quantiles'][0] <= res['quantiles'][2]))
+
+    expected = double_pendulum((0.5, 0, 0.5, 0), ts, m=(1, 1), l=(1, 2))
+    assert(res['quantiles'][1, -1] == pytest.approx(expected[-1, 2], abs=0.05))
+
+def test_uq_stopping():
+    ''' Test the samples stop growing when the estimates converge, or at the maximum
+    '''
+    ts = np.linspace(0, 1, 11)
+
+    loose = propagate(pendulum, {'l': (0.5, 1.5)}, (1, 0), ts, method='lhs', sensitivity=False, tol=0.1, seed=0)
+    strict = propagate(pendulum, {'l': (0.5, 1.5)}, (1, 0), ts, method='lhs', sensitivity=False, tol=1e-9, n_max=256, seed=0)
+
+    assert(loose['converged'] and loose['n'] < strict['n'])
+    assert(not strict['converged'] and strict['n'] == 256)
+    assert(np.all(strict['history']['n'] == (64, 128, 256)))
+
+@pytest.mark.xfail(raises=ValueError)
+def test_uq_wrong_inputs():
+    ''' Test wrong input (parameter of another model)
+    '''
+    propagate(pendulum, {'m1': (1, 2)}, (0, 0), np.linspace(0, 1, 11))
@@ -0,0 +1,185 @@
+import numpy as np
+from scipy.stats import qmc
+from pendulum.models import pendulum_ensemble, double_pendulum_ensemble
+
+## For each model: its ensemble solver, the names of the state variables
+## (uncertain initial conditions) and of the parameters that can be uncertain
+_MODELS = {'pendulum': (pendulum_ensemble, ('th', 'w'), ('l', 'g', 'd')),
+           'double_pendulum': (double_pendulum_ensemble, ('th1', 'w1', 'th2', 'w2'), ('m1', 'm2', 'l1', 'l2', 'g'))}
+
+def propagate(model, uncertain, yinit, ts, qoi=None, method='sobol', sensitivity=True, quantiles=(0.05, 0.5, 0.95), n_initial=64, n_max=4096, tol=1e-2, index_tol=2e-2, batch=2048, seed=None, **kwargs):
+    """Propagates the uncertainty of the parameters and initial conditions to a quantity of interest
+
+    The uncertain inputs are sampled with a scrambled Sobol sequence (or
+    Latin hypercubes), and all the samples of a round are integrated as
+    batched ensembles. The number of samples is doubled at every round until
+    the estimates converge.
+
+    The Sobol sensitivity indices are estimated with the Saltelli scheme: two
+    sample matrices A and B, and one matrix per input with the column of that
+    input taken from B. Each round costs n * (k + 2) simulations, where k is
+    the number of uncertain inputs (only n with sensitivity=False). The first
+    order indices use the estimator of Saltelli (2010) and the total ones the
+    estimator of Jansen (1999).
+
+    :param model: pendulum or double_pendulum (or their names)
+    :param uncertain: dictionary of uncertain inputs. The keys are the names of initial conditions (th, w or th1, w1, th2, w2) or parameters (l, g, d or m1, m2, l1, l2, g). The values are scipy.stats frozen distributions, or (low, high) for uniform ones
+    :param yinit: the initial condition (its uncertain components are ignored)
+    :param ts: integration times
+    :param qoi: quantity of interest, as a function of (ts, sol) of an ensemble returning one value (or array) per member. Defaults to the final angle (of the first pendulum)
+    :param method: 'sobol' or 'lhs'. Sobol sequences are extended at each round, while independent Latin hypercubes are added
+    :param sensitivity: set to False to estimate only the mean, standard deviation and quantiles
+    :param quantiles: the quantiles to estimate
+    :param n_initial: number of samples of the first round (a power of 2)
+    :param n_max: maximum number of samples
+    :param tol: maximum change of the mean between rounds, relative to the standard deviation
+    :param index_tol: maximum change of the sensitivity indices between rounds
+    :param batch: maximum number of members of each ensemble integration
+    :param seed: seed of the scrambling
+    :param ``**kwargs``: fixed parameters and keyword arguments of the ensemble solver
+    :returns: a dictionary with names (the uncertain inputs, in order), mean, std, quantiles, first_order and total (one row per input), n (samples), simulations, converged and history (running means)
+    """
+
+    ## Avoid wrong inputs
+    name = getattr(model, '__name__', model)
+    if name not in _MODELS:
+        raise ValueError('Wrong model. Use one of {}'.format(sorted(_MODELS)))
+    solver, states, params = _MODELS[name]
+
+    names = list(uncertain)
+    unknown = [key for key in names if key not in states + params]
+    if not names or unknown:
+        raise ValueError('Wrong uncertain inputs {}. Expected some of {}'.format(unknown, states + params))
+
+    yinit = np.asarray(yinit, dtype=float)
+    if yinit.shape != (len(states),):
+        raise ValueError('Wrong initial condition (yinit). Expected {}-elements vector'.format(len(states)))
+
+    fixed = set(names) & set(kwargs)
+    if fixed:
+        raise ValueError('Wrong arguments. {} are both uncertain and fixed'.format(sorted(fixed)))
+
+    if method not in ('sobol', 'lhs'):
+        raise ValueError("Wrong method. Expected 'sobol' or 'lhs'")
+
+    if (n_initial < 2) or (n_initial & (n_initial - 1)): # Sobol sequences are balanced for powers of 2
+        raise ValueError('Wrong number of samples (n_initial). Expected a power of 2')
+
+    ## Sampling
+    k = len(names)
+    dim = 2*k if sensitivity else k # Columns of A and B
+    if method == 'sobol':
+        sampler = qmc.Sobol(dim, scramble=True, seed=seed)
+        draw = sampler.random
+    else:
+        rng = np.random.default_rng(seed)
+        draw = lambda n : qmc.LatinHypercube(dim, seed=rng).random(n)
+
+    f = lambda samples : _evaluate(solver, states, names, samples, yinit, ts, qoi, batch, kwargs)
+
+    ## Rounds
+    fA, fB, fAB = [], [], []
+    history = {'n': [], 'mean': []}
+    previous = None
+    converged = False
+    n = 0
+    while n < n_max:
+        ## Double the samples (except in the first round)
+        new = n_initial if n == 0 else min(n, n_max - n)
+        u = draw(new)
+        A = _transform(u[:, :k], [uncertain[key] for key in names])
+        fA.append(f(A))
+        if sensitivity:
+            B = _transform(u[:, k:], [uncertain[key] for key in names])
+            fB.append(f(B))
+            AB = np.tile(A, (k, 1, 1))
+            for i in range(k):
+                AB[i, :, i] = B[:, i]
+            fAB.append(f(AB.reshape(k*new, k)).reshape((k, new) + fA[-1].shape[1:]))
+        n += new
+
+        ## Estimates
+        result = _estimate(np.concatenate(fA), np.concatenate(fB) if sensitivity else None, np.concatenate(fAB, axis=1) if sensitivity else None, quantiles)
+        history['n'].append(n)
+        history['mean'].append(result['mean'])
+
+        if previous is not None:
+            scale = np.maximum(result['std'], np.finfo(float).tiny)
+            converged = np.all(np.abs(result['mean'] - previous['mean']) <= tol * scale)
+            if sensitivity:
+                converged = converged and np.all(np.abs(result['first_order'] - previous['first_order']) <= index_tol) \
+                                      and np.all(np.abs(result['total'] - previous['total']) <= index_tol)
+        if converged:
+            break
+        previous = result
+
+    result.update(names=names, n=n, simulations=n * (k + 2 if sensitivity else 1), converged=bool(converged),
+                  history={'n': np.array(history['n']), 'mean': np.array(history['mean'])})
+
+    return result
+
+def _transform(u, distributions):
+    """ Maps samples of the unit hypercube to the distributions of the inputs
+    """
+
+    x = np.empty_like(u)
+    for i, dist in enumerate(distributions):
+        if hasattr(dist, 'ppf'):
+            x[:, i] = dist.ppf(u[:, i])
+        else:
+            low, high = dist
+            x[:, i] = low + u[:, i] * (high - low)
+
+    return x
+
+def _evaluate(solver, states, names, samples, yinit, ts, qoi, batch, kwargs):
+    """ Returns the quantity of interest of each sample, integrating them as batched ensembles
+    """
+
+    qoi = qoi if qoi is not None else lambda ts, sol : sol[-1, :, 0]
+    columns = dict(zip(names, samples.T))
+
+    yinits = np.tile(yinit, (len(samples), 1))
+    for i, key in enumerate(states):
+        if key in columns:
+            yinits[:, i] = columns[key]
+
+    params = {key: value for key, value in columns.items() if key in ('l', 'g', 'd')}
+    if solver is double_pendulum_ensemble:
+        m, l = kwargs.get('m', (1, 1)), kwargs.get('l', (1, 1))
+        params = {'g': columns['g']} if 'g' in columns else {}
+        if {'m1', 'm2'} & set(columns):
+            params['m'] = (columns.get('m1', m[0]), columns.get('m2', m[1]))
+        if {'l1', 'l2'} & set(columns):
+            params['l'] = (columns.get('l1', l[0]), columns.get('l2', l[1]))
+
+    ## Integrate in batches
+    take = lambda value, s : tuple(take(v, s) for v in value) if isinstance(value, tuple) else (value[s] if np.ndim(value) else value)
+    out = []
+    for i in range(0, len(samples), batch):
+        s = slice(i, i + batch)
+        sol = solver(yinits[s], ts, **dict(kwargs, **{key: take(value, s) for key, value in params.items()}))
+        out.append(np.asarray(qoi(ts, sol)))
+
+    return np.concatenate(out)
+
+def _estimate(fA, fB, fAB, quantiles):
+    """ Returns the statistics of the quantity of interest
+
+    :param fA: the quantity of interest for the samples of A
+    :param fB: the same for B (None, if the sensitivity is not estimated)
+    :param fAB: the same for each of the AB matrices, with shape (k,) + fA.shape
+    :param quantiles: the quantiles to estimate
+    """
+
+    f = fA if fB is None else np.concatenate((fA, fB))
+    result = {'mean': np.mean(f, axis=0),
+              'std': np.std(f, axis=0, ddof=1),
+              'quantiles': np.quantile(f, quantiles, axis=0)}
+
+    if fB is not None:
+        V = np.maximum(np.var(f, axis=0, ddof=1), np.finfo(float).tiny)
+        result['first_order'] = np.mean(fB * (fAB - fA), axis=1) / V
+        result['total'] = 0.5 * np.mean((fA - fAB)**2, axis=1) / V
+
+    return result
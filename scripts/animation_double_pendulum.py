@@ -67,4 +67,8 @@ ani = animation.FuncAnimation(fig, animate, np.arange(1, len(ts)),
 # writer = Writer(fps=100, metadata=dict(artist='Me'), bitrate=1800)
 # ani.save('im.mp4', writer = writer)
 
+## Or render headlessly, in parallel (much faster for long animations)
+# from pendulum.render import render
+# render(sol, ts, 'im.mp4', pos_x, pos_y, l=l, fps=30)
+
 plt.show()
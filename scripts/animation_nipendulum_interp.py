@@ -22,6 +22,11 @@ data = data.dropna() # Remove artifacts
 pos_x = interp1d(data.t, data.x, kind = 'cubic')
 pos_y = interp1d(data.t, data.y, kind = 'cubic')
 
+## For huge logs, convert them once to a memory-mapped binary file instead
+# from pendulum.pivotlog import convert, PivotLog
+# convert('./scripts/data.csv', './scripts/data.npy')
+# pos_x, pos_y = PivotLog('./scripts/data.npy').pivot(-5, 10)
+
 ts = np.linspace(-5, 10, 1000) # Simulation time
 yinit = (0, 0) # Initial condition (th_0, w_0)
 
@@ -23,5 +23,8 @@ setup(
     install_requires=[
           'sdeint',
       ],
-    packages=find_packages(exclude=('tests', 'docs', 'vignettes', 'scripts', 'drafts'))
+    packages=find_packages(exclude=('tests', 'docs', 'vignettes', 'scripts', 'drafts')),
+    entry_points={
+          'console_scripts': ['pendulum=pendulum.cli:main'],
+      }
 )